@@ -1,6 +1,8 @@
 # api/admin.py
 from django.contrib import admin
-from .models import Project, Task, Dependency, ProjectCollaborator, DependencyGroup
+from .models import (
+    Project, Task, Dependency, ProjectCollaborator, DependencyGroup, ProjectAccess, TaskReachability
+)
 
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
@@ -29,4 +31,13 @@ class DependencyGroupAdmin(admin.ModelAdmin):
 @admin.register(ProjectCollaborator)
 class ProjectCollaboratorAdmin(admin.ModelAdmin):
     list_display = ['project', 'user', 'role']
-    raw_id_fields = ['project', 'user']
\ No newline at end of file
+    raw_id_fields = ['project', 'user']
+
+@admin.register(ProjectAccess)
+class ProjectAccessAdmin(admin.ModelAdmin):
+    list_display = ['project', 'user']
+    raw_id_fields = ['project', 'user']
+@admin.register(TaskReachability)
+class TaskReachabilityAdmin(admin.ModelAdmin):
+    list_display = ['project', 'ancestor', 'descendant']
+    raw_id_fields = ['project', 'ancestor', 'descendant']
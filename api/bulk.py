@@ -0,0 +1,74 @@
+# api/bulk.py
+from collections import Counter
+from django.db import transaction
+from .models import Task, DependencyGroup, Dependency
+from .reachability import reindex_tasks
+from .schedule_queue import bump_graph_version, recalculate_project
+
+BULK_BATCH_SIZE = 500
+
+@transaction.atomic
+def import_task_tree(project, tasks, levels):
+    """Insert a validated task tree and its dependency groups in bulk.
+
+    `tasks` are BulkTaskSerializer items and `levels` lists their refs
+    parents-first, as computed by BulkImportSerializer. bulk_create sends
+    no signals and skips save(), so the values those maintain (privacy,
+    paths, rollups, readiness counters, reachability, graph version) are
+    set here, and the project is scheduled once at the end. Returns
+    {ref: task_id}.
+    """
+    by_ref = {spec['ref']: spec for spec in tasks}
+    children = Counter(spec['parent'] for spec in tasks if spec['parent'])
+    ids = {}
+    is_private = {}
+    paths = {}
+
+    for level in levels:
+        rows = []
+        for ref in level:
+            spec = by_ref[ref]
+            parent = spec['parent']
+            # Subtasks inherit privacy from their parent, as in Task.save
+            is_private[ref] = is_private[parent] if parent else spec['is_private']
+            rows.append(Task(
+                project=project,
+                parent_task_id=ids[parent] if parent else None,
+                title=spec['title'],
+                description=spec['description'],
+                duration_days=spec['duration_days'],
+                assigned_to_id=spec['assigned_to'],
+                is_private=is_private[ref],
+                subtask_count=children[ref]
+            ))
+        created = Task.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE)
+        ids.update(zip(level, (task.pk for task in created)))
+        # Paths need the new ids; parents were written one level earlier
+        for ref, task in zip(level, created):
+            parent = by_ref[ref]['parent']
+            task.path = f"{paths[parent] if parent else '/'}{task.pk}/"
+            paths[ref] = task.path
+        Task.objects.bulk_update(created, ['path'], batch_size=BULK_BATCH_SIZE)
+
+    # New tasks start incomplete, so no dependency is satisfied yet
+    group_specs = [
+        (ids[spec['ref']], group)
+        for spec in tasks for group in spec['dependency_groups']
+    ]
+    groups = DependencyGroup.objects.bulk_create([
+        DependencyGroup(task_id=task_id, logic_type=group['logic_type'],
+                        total_count=len(group['depends_on']))
+        for task_id, group in group_specs
+    ], batch_size=BULK_BATCH_SIZE)
+    Dependency.objects.bulk_create([
+        Dependency(group_id=group.pk, depends_on_id=ids[ref])
+        for group, (_, spec) in zip(groups, group_specs)
+        for ref in spec['depends_on']
+    ], batch_size=BULK_BATCH_SIZE)
+    # The new tasks only depend on each other
+    reindex_tasks(project.pk, ids.values())
+
+    bump_graph_version(project.pk)
+    project.refresh_from_db(fields=['graph_version', 'scheduled_version', 'updated_at'])
+    recalculate_project(project)
+    return ids
@@ -0,0 +1,138 @@
+# api/critical_path.py
+"""Forward/backward pass (CPM) over a ProjectGraph.
+
+Offsets are days from the project start and use the scheduler's
+conventions: a task ends `duration` days after it starts, an AND group
+waits for its latest dependency and an OR group for its earliest.
+Assignee calendars are ignored, so the float is the slack the dependency
+logic alone allows.
+
+In the backward pass an OR dependency only constrains its dependent when
+no other dependency of the group finishes early enough on its own; with
+the rest of the group at their earliest finish, it could otherwise slip
+without moving anything.
+"""
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # optional; large graphs use the vectorized pass
+    np = None
+
+VECTORIZE_MIN_TASKS = 5000
+UNREACHED = -1  # tasks on a cycle have no offsets
+
+def analyze_graph(graph):
+    """(es, ef, ls, lf) offsets per task index, UNREACHED off the DAG"""
+    if np is not None and len(graph) >= VECTORIZE_MIN_TASKS:
+        return _analyze_vectorized(graph)
+    return _analyze(graph)
+
+def _analyze(graph):
+    n = len(graph)
+    order = graph.topological_order()
+    durations, deps, dep_offsets = graph.durations, graph.deps, graph.dep_offsets
+    es = array('l', [UNREACHED]) * n
+    ef = array('l', [UNREACHED]) * n
+    for i in order:
+        es[i] = graph.dependency_start(i, ef, 0)
+        ef[i] = es[i] + durations[i]
+
+    finish = max((ef[i] for i in order), default=0)
+    lf = array('l', [UNREACHED]) * n
+    for i in order:
+        lf[i] = finish
+    # Successors come later in the order, so each lf is final when reached
+    for j in reversed(order):
+        ls_j = lf[j] - durations[j]
+        for g in range(graph.group_offsets[j], graph.group_offsets[j + 1]):
+            group = deps[dep_offsets[g]:dep_offsets[g + 1]]
+            if graph.group_is_and[g]:
+                for d in group:
+                    lf[d] = min(lf[d], ls_j)
+                continue
+            ends = sorted(ef[d] for d in group)
+            second = ends[1] if len(ends) > 1 else float('inf')
+            for d in group:
+                # Earliest finish among the rest of the group
+                other = second if ef[d] == ends[0] else ends[0]
+                if other > ls_j:
+                    lf[d] = min(lf[d], ls_j)
+
+    ls = array('l', [UNREACHED]) * n
+    for i in order:
+        ls[i] = lf[i] - durations[i]
+    return es, ef, ls, lf
+
+def _segments(offsets, rows):
+    """Flat positions of the CSR rows `rows` and each row's length"""
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    shift = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return shift + np.arange(lengths.sum()), lengths
+
+def _levels(n, in_degree, succ_offsets, successors):
+    """Kahn's algorithm one wave at a time; yields arrays of task indices"""
+    frontier = np.flatnonzero(in_degree == 0)
+    while frontier.size:
+        yield frontier
+        positions, _ = _segments(succ_offsets, frontier)
+        targets = successors[positions]
+        np.subtract.at(in_degree, targets, 1)
+        frontier = np.unique(targets[in_degree[targets] == 0])
+
+def _analyze_vectorized(graph):
+    n = len(graph)
+    durations = np.asarray(graph.durations, dtype=np.int64)
+    deps = np.asarray(graph.deps, dtype=np.int64)
+    dep_offsets = np.asarray(graph.dep_offsets, dtype=np.int64)
+    group_offsets = np.asarray(graph.group_offsets, dtype=np.int64)
+    is_and = np.asarray(graph.group_is_and, dtype=bool)
+    succ_offsets, successors = (np.asarray(a, dtype=np.int64) for a in graph.successors())
+    in_degree = np.asarray(graph.in_degrees(), dtype=np.int64)
+    levels = list(_levels(n, in_degree, succ_offsets, successors))
+
+    def groups_of(tasks):
+        # Groups with at least one dependency, so every segment is non-empty
+        groups, lengths = _segments(group_offsets, tasks)
+        owners = np.repeat(tasks, lengths)
+        keep = dep_offsets[groups + 1] > dep_offsets[groups]
+        groups, owners = groups[keep], owners[keep]
+        positions, sizes = _segments(dep_offsets, groups)
+        return groups, owners, deps[positions], sizes, np.cumsum(sizes) - sizes
+
+    es = np.full(n, UNREACHED, dtype=np.int64)
+    ef = np.full(n, UNREACHED, dtype=np.int64)
+    plans = []
+    for tasks in levels:
+        groups, owners, members, sizes, starts = plan = groups_of(tasks)
+        plans.append(plan)
+        es[tasks] = 0
+        if groups.size:
+            ends = ef[members]
+            value = np.where(
+                is_and[groups], np.maximum.reduceat(ends, starts), np.minimum.reduceat(ends, starts)
+            )
+            np.maximum.at(es, owners, value)
+        ef[tasks] = es[tasks] + durations[tasks]
+
+    reached = es != UNREACHED
+    finish = ef[reached].max() if reached.any() else 0
+    lf = np.where(reached, finish, UNREACHED)
+    for tasks, (groups, owners, members, sizes, starts) in zip(reversed(levels), reversed(plans)):
+        if not groups.size:
+            continue
+        ls_owner = np.repeat(lf[owners] - durations[owners], sizes)
+        ends = ef[members]
+        first = np.repeat(np.minimum.reduceat(ends, starts), sizes)
+        at_first = ends == first
+        # Second smallest end per group: the first again when it is tied
+        ties = np.add.reduceat(at_first.astype(np.int64), starts)
+        rest = np.minimum.reduceat(np.where(at_first, np.iinfo(np.int64).max, ends), starts)
+        second = np.repeat(np.where(ties > 1, first[starts], rest), sizes)
+        other = np.where(at_first, second, first)
+        binding = np.repeat(is_and[groups], sizes) | (other > ls_owner)
+        np.minimum.at(lf, members[binding], ls_owner[binding])
+
+    ls = np.where(reached, lf - durations, UNREACHED)
+    return es, ef, ls, lf
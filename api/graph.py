@@ -0,0 +1,294 @@
+# api/graph.py
+from array import array
+from collections import deque
+from heapq import heappop, heappush
+from collections.abc import Mapping
+from datetime import date
+from .models import Task, Dependency
+
+NO_DATE = 0  # date.toordinal() is never below 1
+NO_USER = 0
+LOAD_CHUNK_SIZE = 2000
+
+class ProjectGraph:
+    """A project's tasks and dependency groups in flat integer arrays.
+
+    Tasks are numbered 0..n-1 in the default Task ordering. The groups of
+    task i are group_offsets[i]:group_offsets[i + 1]; the dependencies of
+    group g are the task indices deps[dep_offsets[g]:dep_offsets[g + 1]],
+    with -1 for a task outside the project. Dates are ordinals, NO_DATE
+    when unset, and users are ids, NO_USER when unassigned. A graph may
+    span several projects; project_ids holds each task's project.
+    """
+    __slots__ = (
+        'ids', 'project_ids', 'durations', 'users', 'stored_start', 'stored_end',
+        'group_offsets', 'group_is_and', 'dep_offsets', 'deps'
+    )
+
+    def __init__(self):
+        self.ids = array('q')
+        self.project_ids = array('q')
+        self.durations = array('l')
+        self.users = array('q')
+        self.stored_start = array('l')
+        self.stored_end = array('l')
+        self.group_offsets = array('l', [0])
+        self.group_is_and = array('b')
+        self.dep_offsets = array('l', [0])
+        self.deps = array('l')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def user_ids(self):
+        return set(self.users) - {NO_USER}
+
+    def copy(self):
+        """Independent copy; arrays are duplicated with one memcpy each"""
+        graph = ProjectGraph.__new__(ProjectGraph)
+        for name in self.__slots__:
+            setattr(graph, name, array(getattr(self, name).typecode, getattr(self, name)))
+        return graph
+
+    def index(self):
+        """{task_id: task index}"""
+        return {task_id: i for i, task_id in enumerate(self.ids)}
+
+    def successors(self):
+        """Reverse adjacency as CSR (offsets, targets), in task order"""
+        n = len(self.ids)
+        counts = array('l', [0]) * (n + 1)
+        for d in self.deps:
+            if d >= 0:
+                counts[d + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+        offsets = array('l', counts)
+        targets = array('l', [0]) * len(self.deps)
+        fill = counts  # reused as the write cursor per source
+        for i in range(n):
+            for g in range(self.group_offsets[i], self.group_offsets[i + 1]):
+                for k in range(self.dep_offsets[g], self.dep_offsets[g + 1]):
+                    d = self.deps[k]
+                    if d >= 0:
+                        targets[fill[d]] = i
+                        fill[d] += 1
+        return offsets, targets
+
+    def in_degrees(self):
+        """Number of dependencies of each task, across all its groups"""
+        group_offsets, dep_offsets = self.group_offsets, self.dep_offsets
+        return array('l', (
+            dep_offsets[group_offsets[i + 1]] - dep_offsets[group_offsets[i]]
+            for i in range(len(self.ids))
+        ))
+
+    def topological_order(self):
+        """Task indices in Kahn order; tasks on a cycle are left out"""
+        succ_offsets, successors = self.successors()
+        in_degree = self.in_degrees()
+        order = array('l', (i for i in range(len(self.ids)) if in_degree[i] == 0))
+        for i in order:  # grows while iterating
+            for k in range(succ_offsets[i], succ_offsets[i + 1]):
+                neighbor = successors[k]
+                in_degree[neighbor] -= 1
+                if in_degree[neighbor] == 0:
+                    order.append(neighbor)
+        return order
+
+    def dependency_start(self, i, end, origin):
+        """Earliest start of task i allowed by its groups, given the ends so far"""
+        dependency_start = origin
+        deps, dep_offsets = self.deps, self.dep_offsets
+        for g in range(self.group_offsets[i], self.group_offsets[i + 1]):
+            ends = [end[d] for d in deps[dep_offsets[g]:dep_offsets[g + 1]]]
+            if ends:
+                dependency_start = max(dependency_start, max(ends) if self.group_is_and[g] else min(ends))
+        return dependency_start
+
+def load_project_graph(project):
+    """Read a project into a ProjectGraph with two value queries"""
+    return _load_graph(
+        Task.objects.filter(project=project),
+        Dependency.objects.filter(group__task__project=project)
+    )
+
+def load_portfolio_graph(project_ids):
+    """Read several projects into one ProjectGraph with two value queries"""
+    return _load_graph(
+        Task.objects.filter(project__in=project_ids),
+        Dependency.objects.filter(group__task__project__in=project_ids)
+    )
+
+def _load_graph(tasks, dependencies):
+    graph = ProjectGraph()
+    index = {}
+    # Descending ids, matching the edge order below
+    rows = tasks.order_by('-id').values_list(
+        'id', 'project_id', 'duration_days', 'assigned_to_id', 'start_date', 'end_date'
+    )
+    for task_id, project_id, duration, user_id, start, end in rows.iterator(chunk_size=LOAD_CHUNK_SIZE):
+        index[task_id] = len(graph.ids)
+        graph.ids.append(task_id)
+        graph.project_ids.append(project_id)
+        graph.durations.append(duration)
+        graph.users.append(user_id or NO_USER)
+        graph.stored_start.append(start.toordinal() if start else NO_DATE)
+        graph.stored_end.append(end.toordinal() if end else NO_DATE)
+
+    # Edges arrive grouped by task in the same order as the task rows
+    edges = dependencies.order_by(
+        '-group__task_id', 'group_id'
+    ).values_list('group__task_id', 'group_id', 'group__logic_type', 'depends_on_id')
+    current_task = current_group = None
+    for task_id, group_id, logic_type, dep_id in edges.iterator(chunk_size=LOAD_CHUNK_SIZE):
+        if task_id != current_task:
+            # Close the groups of every task up to this one
+            while len(graph.group_offsets) <= index[task_id]:
+                graph.group_offsets.append(len(graph.group_is_and))
+            current_task = task_id
+        if group_id != current_group:
+            if current_group is not None:
+                graph.dep_offsets.append(len(graph.deps))
+            graph.group_is_and.append(logic_type == 'AND')
+            current_group = group_id
+        graph.deps.append(index.get(dep_id, -1))
+    if current_group is not None:
+        graph.dep_offsets.append(len(graph.deps))
+    while len(graph.group_offsets) <= len(graph.ids):
+        graph.group_offsets.append(len(graph.group_is_and))
+    return graph
+
+def schedule_graph(graph, project_start, busy):
+    """Earliest start/end of every task, as arrays of date ordinals.
+
+    Tasks run in Kahn order once all their dependencies are placed: each
+    AND group waits for its latest dependency, each OR group for its
+    earliest, and an assignee works one task at a time, skipping the
+    intervals in `busy` ({user_id: [(start_date, end_date), ...]}). Tasks
+    left on a cycle start when their assignee is next free.
+    """
+    n = len(graph)
+    origin = project_start.toordinal()
+    start = array('l', [NO_DATE]) * n
+    end = array('l', [NO_DATE]) * n
+    busy = {
+        user_id: [(s.toordinal(), e.toordinal()) for s, e in intervals]
+        for user_id, intervals in busy.items()
+    }
+    next_free = {}
+    succ_offsets, successors = graph.successors()
+    in_degree = graph.in_degrees()
+    queue = deque(i for i in range(n) if in_degree[i] == 0)
+
+    while queue:
+        i = queue.popleft()
+        dependency_start = graph.dependency_start(i, end, origin)
+
+        duration = graph.durations[i]
+        user_id = graph.users[i]
+        task_start = dependency_start
+        if user_id != NO_USER:
+            task_start = max(task_start, next_free.get(user_id, origin))
+            # Next free slot for the user, skipping work in other projects
+            for busy_start, busy_end in busy.get(user_id, ()):
+                if task_start <= busy_end and task_start + duration >= busy_start:
+                    task_start = busy_end + 1
+            next_free[user_id] = task_start + duration + 1
+        start[i] = task_start
+        end[i] = task_start + duration
+
+        for k in range(succ_offsets[i], succ_offsets[i + 1]):
+            neighbor = successors[k]
+            in_degree[neighbor] -= 1
+            if in_degree[neighbor] == 0:
+                queue.append(neighbor)
+
+    # Tasks on a cycle (or depending on another project) never became ready
+    for i in range(n):
+        if start[i] == NO_DATE:
+            user_id = graph.users[i]
+            start[i] = next_free.get(user_id, origin) if user_id != NO_USER else origin
+            end[i] = start[i] + graph.durations[i]
+    return start, end
+
+def level_graph(graph, origins):
+    """Resource-leveled start/end of every task of a multi-project graph.
+
+    Priority list scheduling over the combined DAG: ready tasks wait in a
+    heap keyed by their dependency start (ties go to task order) and each
+    one popped is booked on its assignee's calendar at the first free day.
+    Keys leave the heap in non-decreasing order, so a user's calendar only
+    moves forward and nobody is double-booked across projects. `origins`
+    maps project_id -> start ordinal. Returns arrays of date ordinals.
+    """
+    n = len(graph)
+    start = array('l', [NO_DATE]) * n
+    end = array('l', [NO_DATE]) * n
+    next_free = {}
+    succ_offsets, successors = graph.successors()
+    in_degree = graph.in_degrees()
+    project_ids = graph.project_ids
+    heap = [(origins[project_ids[i]], i) for i in range(n) if in_degree[i] == 0]
+    heap.sort()
+
+    while heap:
+        ready, i = heappop(heap)
+        user_id = graph.users[i]
+        task_start = ready
+        if user_id != NO_USER:
+            task_start = max(task_start, next_free.get(user_id, ready))
+            next_free[user_id] = task_start + graph.durations[i] + 1
+        start[i] = task_start
+        end[i] = task_start + graph.durations[i]
+
+        for k in range(succ_offsets[i], succ_offsets[i + 1]):
+            neighbor = successors[k]
+            in_degree[neighbor] -= 1
+            if in_degree[neighbor] == 0:
+                origin = origins[project_ids[neighbor]]
+                heappush(heap, (graph.dependency_start(neighbor, end, origin), neighbor))
+
+    # Tasks on a cycle never became ready; book them after the user's work
+    for i in range(n):
+        if start[i] == NO_DATE:
+            user_id = graph.users[i]
+            origin = origins[project_ids[i]]
+            start[i] = max(origin, next_free.get(user_id, origin)) if user_id != NO_USER else origin
+            end[i] = start[i] + graph.durations[i]
+            if user_id != NO_USER:
+                next_free[user_id] = end[i] + 1
+    return start, end
+
+def changed_dates(graph, start, end):
+    """(task_id, start_date, end_date) rows that differ from the stored dates"""
+    for i in range(len(graph)):
+        if start[i] != graph.stored_start[i] or end[i] != graph.stored_end[i]:
+            yield graph.ids[i], date.fromordinal(start[i]), date.fromordinal(end[i])
+
+class GraphSchedule(Mapping):
+    """Read-only {task_id: {'start', 'end', 'user'}} view over computed arrays"""
+    __slots__ = ('graph', 'start', 'end', '_index')
+
+    def __init__(self, graph, start, end):
+        self.graph = graph
+        self.start = start
+        self.end = end
+        self._index = None
+
+    def __getitem__(self, task_id):
+        if self._index is None:
+            self._index = self.graph.index()
+        i = self._index[task_id]
+        user_id = self.graph.users[i]
+        return {
+            'start': date.fromordinal(self.start[i]),
+            'end': date.fromordinal(self.end[i]),
+            'user': user_id if user_id != NO_USER else None,
+        }
+
+    def __iter__(self):
+        return iter(self.graph.ids)
+
+    def __len__(self):
+        return len(self.graph)
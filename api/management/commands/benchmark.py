@@ -0,0 +1,69 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from benchmarks.generator import SHAPES
+from benchmarks.suite import run_suite, compare
+
+class Command(BaseCommand):
+    help = "Benchmark scheduling and the API against a synthetic project in a throwaway database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1000)
+        parser.add_argument('--shape', choices=SHAPES, default='layered')
+        parser.add_argument('--width', type=int, default=50, help="Tasks per layer (layered shape)")
+        parser.add_argument('--fan-in', type=int, default=2, help="Dependencies per task")
+        parser.add_argument('--or-ratio', type=float, default=0.2, help="Share of dependencies in OR groups")
+        parser.add_argument('--subtask-depth', type=int, default=0)
+        parser.add_argument('--subtask-ratio', type=float, default=0.1)
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--only', nargs='+', help="Run only these benchmarks")
+        parser.add_argument('--output', '-o', help="Write results as JSON to this file")
+        parser.add_argument('--compare', help="Baseline results JSON to compare against")
+        parser.add_argument('--threshold', type=float, default=1.2,
+                            help="Median ratio above which --compare reports a regression")
+
+    def handle(self, *args, **options):
+        config = {
+            'tasks': options['tasks'],
+            'shape': options['shape'],
+            'width': options['width'],
+            'fan_in': options['fan_in'],
+            'or_ratio': options['or_ratio'],
+            'subtask_depth': options['subtask_depth'],
+            'subtask_ratio': options['subtask_ratio'],
+            'users': options['users'],
+            'seed': options['seed'],
+        }
+
+        # Never touch the configured database
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            report = run_suite(config, repeat=options['repeat'], only=options['only'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for name, result in report['results'].items():
+            self.stdout.write(
+                f"{name:<24} median {result['median_ms']:>10.2f} ms  "
+                f"min {result['min_ms']:>10.2f} ms  queries {result['queries']}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as out:
+                json.dump(report, out, indent=2)
+
+        if options['compare']:
+            with open(options['compare']) as baseline:
+                rows = compare(report, json.load(baseline), options['threshold'])
+            regressed = []
+            for name, before, after, ratio, is_regression in rows:
+                self.stdout.write(f"{name:<24} {before:>10.2f} -> {after:>10.2f} ms  x{ratio:.2f}")
+                if is_regression:
+                    regressed.append(name)
+            if regressed:
+                raise CommandError(f"Regressions over x{options['threshold']}: {', '.join(regressed)}")
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.models import Project
+from api.transfer import export_project
+
+class Command(BaseCommand):
+    help = "Stream a project with its tasks, dependencies and collaborators as NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_id', type=int)
+        parser.add_argument('--output', '-o', help="File to write (default: stdout)")
+
+    def handle(self, *args, **options):
+        project = Project.objects.filter(pk=options['project_id']).first()
+        if project is None:
+            raise CommandError(f"Project {options['project_id']} does not exist")
+
+        if options['output']:
+            with open(options['output'], 'wb') as out:
+                for line in export_project(project):
+                    out.write(line)
+        else:
+            for line in export_project(project):
+                self.stdout.write(line.decode(), ending='')
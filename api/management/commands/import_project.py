@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from api.transfer import ProjectImporter
+
+class Command(BaseCommand):
+    help = "Load an NDJSON project dump as a new project, remapping all ids"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON file written by export_project")
+        parser.add_argument('--creator', required=True, help="Username owning the new project")
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        creator = User.objects.filter(username=options['creator']).first()
+        if creator is None:
+            raise CommandError(f"User {options['creator']} does not exist")
+
+        importer = ProjectImporter(creator, chunk_size=options['chunk_size'])
+        with open(options['path'], 'rb') as lines:
+            try:
+                project = importer.load(lines)
+            except (ValueError, KeyError) as exc:
+                raise CommandError(f"Invalid dump: {exc}")
+
+        if importer.skipped_users:
+            self.stderr.write(f"Unknown users left unassigned: {', '.join(sorted(importer.skipped_users))}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported project {project.pk} with {len(importer.task_ids)} tasks"
+        ))
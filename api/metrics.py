@@ -0,0 +1,99 @@
+# api/metrics.py
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+class Histogram:
+    """Cumulative Prometheus-style histogram keyed by label values.
+
+    Kept in process memory, so each worker process exposes its own series.
+    """
+
+    def __init__(self, name, help_text, labelnames, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)]
+            for bound, count in zip(self.buckets + ('+Inf',), values[:-2] + values[-1:]):
+                le = f'le="{bound}"'
+                lines.append(f'{self.name}_bucket{_labels(pairs + [le])} {count}')
+            lines.append(f'{self.name}_sum{_labels(pairs)} {values[-2]}')
+            lines.append(f'{self.name}_count{_labels(pairs)} {values[-1]}')
+        return '\n'.join(lines)
+
+def _labels(pairs):
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+request_duration = Histogram(
+    'http_request_duration_seconds', 'Time spent handling a request.',
+    ('method', 'route', 'status')
+)
+request_db_duration = Histogram(
+    'http_request_db_seconds', 'Time spent in SQL queries per request.', ('method', 'route')
+)
+request_db_queries = Histogram(
+    'http_request_db_queries', 'SQL queries issued per request.', ('method', 'route'),
+    buckets=QUERY_BUCKETS
+)
+span_duration = Histogram(
+    'span_duration_seconds', 'Time spent in instrumented code paths.', ('span',)
+)
+
+REGISTRY = [request_duration, request_db_duration, request_db_queries, span_duration]
+
+@contextmanager
+def span(name):
+    """Time a block, or a function when used as a decorator, as a labeled span"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        span_duration.observe(time.perf_counter() - started, name)
+
+def render_metrics():
+    return '\n'.join(metric.render() for metric in REGISTRY) + '\n'
+
+def metrics_view(request):
+    """Prometheus scrape endpoint.
+
+    Set METRICS_TOKEN to require an `Authorization: Bearer <token>` header.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and not constant_time_compare(
+        request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+    ):
+        return HttpResponse(status=403)
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,105 @@
+# api/middleware.py
+import cProfile
+import time
+from django.db import connection
+from django.urls import reverse
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from .metrics import request_duration, request_db_duration, request_db_queries
+from .profiling import profiling_settings, save_profile
+
+class QueryTimer:
+    """execute_wrapper that counts queries and sums their time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+class RequestMetricsMiddleware:
+    """Report SQL count, DB time and view time per request.
+
+    Values go to the X-DB-Queries, X-DB-Time-Ms and X-View-Time-Ms response
+    headers and to the per-route histograms served at /metrics. Queries run
+    while a streaming response is consumed happen after this returns and
+    are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        route = match.view_name if match else 'unmatched'
+        request_duration.observe(elapsed, request.method, route, str(response.status_code))
+        request_db_duration.observe(timer.duration, request.method, route)
+        request_db_queries.observe(timer.count, request.method, route)
+
+        response['X-DB-Queries'] = str(timer.count)
+        response['X-DB-Time-Ms'] = f'{timer.duration * 1000:.2f}'
+        response['X-View-Time-Ms'] = f'{elapsed * 1000:.2f}'
+        return response
+
+class ProfilingMiddleware:
+    """Run a request under cProfile when a staff user asks for it.
+
+    Triggered by `?profile=1` or an `X-Profile: 1` header. The user is
+    resolved up front from the session or the API authenticators, and only
+    staff requests are profiled. The stored profile is linked from the
+    X-Profile-URL header. All other requests are passed through.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = profiling_settings()
+        if not (request.GET.get(config['QUERY_PARAM']) or request.META.get(config['HEADER'])):
+            return self.get_response(request)
+        user = request_user(request)
+        if user is None or not user.is_staff:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiler is already active
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+
+        match = request.resolver_match
+        name = save_profile(profiler, match.view_name if match else 'unmatched')
+        response['X-Profile-URL'] = request.build_absolute_uri(
+            reverse('profile-detail', args=[name])
+        )
+        return response
+
+def request_user(request):
+    """The requesting user before the view runs: session first, then token"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    api_request = Request(
+        request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    )
+    try:
+        return api_request.user
+    except APIException:  # bad credentials; the view will reject them
+        return None
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-17 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0002_alter_project_unique_together"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="graph_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="scheduled_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
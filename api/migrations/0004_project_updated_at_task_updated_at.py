@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-17 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0003_project_graph_version_project_scheduled_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-17 15:48
+
+from django.db import migrations, models
+
+
+def backfill_counters(apps, schema_editor):
+    DependencyGroup = apps.get_model("api", "DependencyGroup")
+    groups = DependencyGroup.objects.annotate(
+        total=models.Count("dependencies"),
+        satisfied=models.Count(
+            "dependencies",
+            filter=models.Q(dependencies__depends_on__is_completed=True),
+        ),
+    )
+    for group in groups:
+        group.total_count = group.total
+        group.satisfied_count = group.satisfied
+    DependencyGroup.objects.bulk_update(
+        groups, ["total_count", "satisfied_count"], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0004_project_updated_at_task_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dependencygroup",
+            name="satisfied_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="dependencygroup",
+            name="total_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.1 on 2026-10-17 15:51
+
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    Task = apps.get_model("api", "Task")
+    parents = Task.objects.annotate(
+        total=models.Count("subtasks"),
+        completed=models.Count(
+            "subtasks", filter=models.Q(subtasks__is_completed=True)
+        ),
+        in_progress=models.Count(
+            "subtasks", filter=models.Q(subtasks__status="IN_PROGRESS")
+        ),
+    ).filter(total__gt=0)
+    for parent in parents:
+        parent.subtask_count = parent.total
+        parent.completed_subtask_count = parent.completed
+        parent.in_progress_subtask_count = parent.in_progress
+    Task.objects.bulk_update(
+        parents,
+        ["subtask_count", "completed_subtask_count", "in_progress_subtask_count"],
+        batch_size=500,
+    )
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0005_dependencygroup_readiness_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="completed_subtask_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="in_progress_subtask_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="subtask_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
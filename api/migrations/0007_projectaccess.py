@@ -0,0 +1,59 @@
+# Generated by Django 5.2.1 on 2026-10-17 15:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_access(apps, schema_editor):
+    Project = apps.get_model("api", "Project")
+    ProjectCollaborator = apps.get_model("api", "ProjectCollaborator")
+    ProjectAccess = apps.get_model("api", "ProjectAccess")
+    grants = set(Project.objects.values_list("creator_id", "id"))
+    grants.update(ProjectCollaborator.objects.values_list("user_id", "project_id"))
+    ProjectAccess.objects.bulk_create(
+        [ProjectAccess(user_id=u, project_id=p) for u, p in grants], batch_size=500
+    )
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0006_task_subtask_rollups"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectAccess",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="access",
+                        to="api.project",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="project_access",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("user", "project")},
+            },
+        ),
+        migrations.RunPython(backfill_access, migrations.RunPython.noop),
+    ]
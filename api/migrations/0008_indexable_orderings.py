@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-17 16:01
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0007_projectaccess"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="project",
+            options={"ordering": ["-id"]},
+        ),
+        migrations.AlterModelOptions(
+            name="task",
+            options={"ordering": ["-id"]},
+        ),
+    ]
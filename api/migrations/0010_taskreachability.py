@@ -0,0 +1,90 @@
+# Generated by Django 5.2.1 on 2026-10-17 16:40
+
+import django.db.models.deletion
+from collections import defaultdict
+from django.db import migrations, models
+
+
+def backfill_reachability(apps, schema_editor):
+    Dependency = apps.get_model("api", "Dependency")
+    TaskReachability = apps.get_model("api", "TaskReachability")
+    predecessors = defaultdict(set)
+    project_of = {}
+    edges = Dependency.objects.values_list(
+        "depends_on_id", "group__task_id", "group__task__project_id"
+    )
+    for depends_on_id, task_id, project_id in edges:
+        predecessors[task_id].add(depends_on_id)
+        project_of[task_id] = project_id
+
+    rows = []
+    for task_id in predecessors:
+        # Every task reachable backwards along dependencies
+        seen = set()
+        stack = list(predecessors[task_id])
+        while stack:
+            current = stack.pop()
+            if current not in seen:
+                seen.add(current)
+                stack.extend(predecessors.get(current, ()))
+        rows.extend(
+            TaskReachability(project_id=project_of[task_id], ancestor_id=a, descendant_id=task_id)
+            for a in seen - {task_id}
+        )
+    TaskReachability.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0009_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskReachability",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="api.task",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="api.task",
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="api.project",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["descendant", "ancestor"], name="reach_descendant_idx"
+                    )
+                ],
+                "unique_together": {("ancestor", "descendant")},
+            },
+        ),
+        migrations.RunPython(backfill_reachability, migrations.RunPython.noop),
+    ]
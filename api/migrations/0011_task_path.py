@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-17 17:05
+
+from django.db import migrations, models
+
+
+def backfill_paths(apps, schema_editor):
+    Task = apps.get_model("api", "Task")
+    parents = dict(Task.objects.values_list("id", "parent_task_id"))
+    paths = {}
+    for task_id in parents:
+        chain = []
+        current = task_id
+        while current is not None and current not in paths:
+            chain.append(current)
+            current = parents[current]
+        prefix = paths[current] if current is not None else "/"
+        for node in reversed(chain):
+            prefix = paths[node] = f"{prefix}{node}/"
+    Task.objects.bulk_update(
+        [Task(pk=task_id, path=path) for task_id, path in paths.items()],
+        ["path"], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0010_taskreachability"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="path",
+            field=models.CharField(default="", editable=False, max_length=1024),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["path"], name="task_path_idx"),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
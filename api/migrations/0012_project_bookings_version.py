@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0011_task_path"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="bookings_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
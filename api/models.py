@@ -1,22 +1,65 @@
-from django.db import models
+from contextvars import ContextVar
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.forms import ValidationError
-from django.db.models import Q
+from django.db.models import Q, F, Exists, OuterRef, Value
+from django.db.models.functions import Concat, Substr
+from django.dispatch import Signal
+from django.utils import timezone
 from datetime import timedelta
 
+# Sent once per propagation with the ids of tasks moved to IN_PROGRESS
+tasks_started = Signal()
+# Sent once per subtree delete, after its rows are gone
+subtree_deleted = Signal()
+# Set while a subtree is deleted; the per-row post_delete handlers stand down
+deleting_subtree = ContextVar('deleting_subtree', default=False)
+
 class Project(models.Model):
     creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='projects')
     title = models.CharField(max_length=255)
     description = models.TextField()
     start_date = models.DateField(auto_now_add=True)
     is_public = models.BooleanField(default=True)
+    # Bumped on every graph edit; scheduled_version is the last one scheduled
+    graph_version = models.PositiveIntegerField(default=0)
+    scheduled_version = models.PositiveIntegerField(default=0)
+    # Bumped when the assignees' tasks in other projects move
+    bookings_version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.title} by {self.creator.username}"
 
+    @property
+    def schedule_is_fresh(self):
+        return self.scheduled_version == self.graph_version
+
     class Meta:
-        ordering = ['-start_date']
+        # Newest first; imported projects keep their original start_date
+        ordering = ['-id']
         unique_together = []
+        # Boolean filters compile to bare/NOT column tests that SQLite cannot
+        # match against a plain index column, so they are partial conditions
+        indexes = [
+            # Anonymous and public listings
+            models.Index(fields=['id'], condition=Q(is_public=True), name='project_public_idx'),
+        ]
+
+class TaskQuerySet(models.QuerySet):
+    def ready(self):
+        """Tasks whose dependency groups are all satisfied"""
+        blocked = DependencyGroup.objects.filter(task=OuterRef('pk')).filter(
+            Q(logic_type='AND', satisfied_count__lt=F('total_count')) |
+            Q(logic_type='OR', satisfied_count=0)
+        )
+        return self.exclude(Exists(blocked))
+
+    def subtree(self, task, include_self=True):
+        """The task's subtree as one range scan over the path index"""
+        # '0' sorts right after '/', so this bounds every path under task.path
+        lower = {'path__gte' if include_self else 'path__gt': task.path}
+        return self.filter(**lower, path__lt=task.path[:-1] + '0')
 
 class Task(models.Model):
     STATUS_CHOICES = [
@@ -52,37 +95,164 @@ class Task(models.Model):
     )
     start_date = models.DateField(null=True, blank=True)
     end_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Subtask rollups, adjusted by deltas in api/signals.py
+    subtask_count = models.PositiveIntegerField(default=0)
+    completed_subtask_count = models.PositiveIntegerField(default=0)
+    in_progress_subtask_count = models.PositiveIntegerField(default=0)
+    # Materialized ancestor ids, '/<root id>/.../<own id>/'; set on save
+    path = models.CharField(max_length=1024, default='', editable=False)
+
+    objects = TaskQuerySet.as_manager()
+
+    # Stored values the post_save handlers diff against to find transitions
+    TRACKED_FIELDS = ['is_completed', 'status', 'parent_task_id', 'assigned_to_id']
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored = {f: instance.__dict__.get(f) for f in cls.TRACKED_FIELDS}
+        return instance
 
     def save(self, *args, **kwargs):
         if self.parent_task:
             if self.parent_task.project != self.project:
                 raise ValidationError("Subtasks must belong to the same project as parent")
             self.is_private = self.parent_task.is_private
+            if self.pk and self.path and self.parent_task.path.startswith(self.path):
+                raise ValidationError("A task cannot be moved under its own subtask")
         super().save(*args, **kwargs)
+        self._update_path()
+        self._stored = {f: getattr(self, f) for f in self.TRACKED_FIELDS}
+
+    def _update_path(self):
+        """Set the path after an insert or reparent, moving the subtree with it"""
+        parent_path = self.parent_task.path if self.parent_task else '/'
+        path = f'{parent_path}{self.pk}/'
+        if path == self.path:
+            return
+        if self.path:
+            # Rewrite the old prefix of every descendant in one update
+            Task.objects.subtree(self, include_self=False).update(
+                path=Concat(Value(path), Substr('path', len(self.path) + 1))
+            )
+        Task.objects.filter(pk=self.pk).update(path=path)
+        self.path = path
+
+    def delete(self, *args, **kwargs):
+        if not self.path:
+            return super().delete(*args, **kwargs)
+        # Collect the whole subtree at once instead of one cascade per level,
+        # and hand the rest of the graph to subtree_deleted as one set
+        subtree = Task.objects.subtree(self)
+        with transaction.atomic():
+            root = Task.objects.filter(pk=self.pk).values(
+                'project_id', 'parent_task_id', 'is_completed', 'status'
+            ).get()
+            # Groups outside the subtree that lose dependencies, and the tasks
+            # outside it that lose ancestors
+            group_ids = list(DependencyGroup.objects.filter(
+                dependencies__depends_on__in=subtree
+            ).exclude(task__in=subtree).values_list('pk', flat=True).distinct())
+            downstream_ids = set(TaskReachability.objects.filter(
+                ancestor__in=subtree
+            ).exclude(descendant__in=subtree).values_list('descendant_id', flat=True))
+            assignee_ids = set(subtree.filter(assigned_to__isnull=False).values_list(
+                'assigned_to_id', flat=True
+            ))
+
+            token = deleting_subtree.set(True)
+            try:
+                deleted = subtree.delete()
+            finally:
+                deleting_subtree.reset(token)
+            subtree_deleted.send(
+                sender=Task, root=root, group_ids=group_ids, downstream_ids=downstream_ids,
+                assignee_ids=assignee_ids
+            )
+        return deleted
+
+    @classmethod
+    def rebuild_paths(cls, project_id):
+        """Recompute every path of a project, for rows written without save()"""
+        parents = dict(cls.objects.filter(project=project_id).values_list('id', 'parent_task_id'))
+        paths = {}
+
+        def path_of(task_id):
+            chain = []
+            while task_id is not None and task_id not in paths:
+                chain.append(task_id)
+                task_id = parents[task_id]
+            prefix = paths[task_id] if task_id is not None else '/'
+            for node in reversed(chain):
+                prefix = paths[node] = f'{prefix}{node}/'
+            return prefix
+
+        cls.objects.bulk_update(
+            [cls(pk=task_id, path=path_of(task_id)) for task_id in parents],
+            ['path'], batch_size=500
+        )
 
     def can_start(self):
-        for group in self.dependency_groups.all():
-            completed_status = [d.depends_on.is_completed for d in group.dependencies.all()]
-            if group.logic_type == 'AND' and not all(completed_status):
-                return False
-            if group.logic_type == 'OR' and not any(completed_status):
-                return False
-        return True
+        return all(group.is_satisfied for group in self.dependency_groups.all())
 
     def update_dependent_tasks(self):
-        for dependency in self.dependent_tasks.all():
-            task = dependency.group.task
-            if task.can_start() and task.status == 'NOT_STARTED':
-                task.status = 'IN_PROGRESS'
-                task.save()
+        """Start every dependent that became ready, in one bulk update"""
+        started = Task.objects.filter(
+            dependency_groups__dependencies__depends_on=self,
+            status='NOT_STARTED'
+        ).ready()
+        task_ids = list(started.values_list('id', flat=True).distinct())
+        if task_ids:
+            Task.objects.filter(pk__in=task_ids).update(
+                status='IN_PROGRESS', updated_at=timezone.now()
+            )
+            tasks_started.send(sender=Task, task_ids=task_ids, project_id=self.project_id)
+        return task_ids
 
     class Meta:
-        ordering = ['-project__start_date', 'title']
+        ordering = ['-id']
+        indexes = [
+            # Open work per assignee: pending-task validation, availability index
+            models.Index(
+                fields=['assigned_to', 'end_date'], condition=Q(is_completed=False),
+                name='task_assignee_open_idx'
+            ),
+            # Subtask rollup recounts and the subtask completion check
+            models.Index(fields=['parent_task', 'status'], name='task_parent_status_idx'),
+            models.Index(
+                fields=['parent_task'], condition=Q(is_completed=False),
+                name='task_parent_open_idx'
+            ),
+            # Public task listings
+            models.Index(
+                fields=['project'], condition=Q(is_private=False),
+                name='task_project_public_idx'
+            ),
+            # Subtree reads, privacy updates and deletes
+            models.Index(fields=['path'], name='task_path_idx'),
+        ]
 
 class DependencyGroup(models.Model):
     LOGIC_TYPES = [('AND', 'All'), ('OR', 'Any')]
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='dependency_groups')
     logic_type = models.CharField(max_length=3, choices=LOGIC_TYPES)
+    # Maintained by signals: dependencies in the group, and completed ones
+    total_count = models.PositiveIntegerField(default=0)
+    satisfied_count = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Stored task, so only a real move reindexes the group's edges
+        instance._stored_task_id = instance.__dict__.get('task_id')
+        return instance
+
+    @property
+    def is_satisfied(self):
+        if self.logic_type == 'AND':
+            return self.satisfied_count == self.total_count
+        return self.satisfied_count > 0
 
     class Meta:
         unique_together = ['task', 'logic_type']
@@ -91,20 +261,89 @@ class Dependency(models.Model):
     group = models.ForeignKey(DependencyGroup, on_delete=models.CASCADE, related_name='dependencies')
     depends_on = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='dependent_tasks')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Stored endpoints, so an edit can recount and unindex the edge it left
+        instance._stored_group_id = instance.__dict__.get('group_id')
+        instance._stored_depends_on_id = instance.__dict__.get('depends_on_id')
+        return instance
+
     def clean(self):
         if self.group.task.project != self.depends_on.project:
             raise ValidationError("Dependencies must be within the same project!")
-        if self.group.task == self.depends_on:
+        self.check_acyclic()
+
+    def check_acyclic(self):
+        """Reject an edge that closes a cycle, using the reachability index"""
+        task_id = self.group.task_id
+        if task_id == self.depends_on_id:
             raise ValidationError("Task cannot depend on itself!")
+        if TaskReachability.reaches(task_id, self.depends_on_id):
+            raise ValidationError("Dependency would create a cycle!")
+
+    def save(self, *args, **kwargs):
+        task = self.group.task
+        with transaction.atomic():
+            # Two new edges can close a cycle without sharing a task, so edge
+            # writes are serialized per project; the index is updated by the
+            # post_save handler before the locks are released
+            list(Project.objects.select_for_update().filter(pk=task.project_id).values_list('pk'))
+            list(Task.objects.select_for_update().filter(
+                pk__in=[task.pk, self.depends_on_id]
+            ).order_by('pk').values_list('pk'))
+            self.check_acyclic()
+            super().save(*args, **kwargs)
 
     class Meta:
         unique_together = ['group', 'depends_on']
 
+class TaskReachability(models.Model):
+    """Materialized (ancestor, descendant) pairs of each project's dependency DAG.
+
+    A row means `descendant` depends on `ancestor` through one or more
+    dependencies. Maintained by api/reachability.py.
+
+    The table holds one row per connected pair, so it grows with the square
+    of the task count in the worst case: a chain of n tasks stores
+    n * (n - 1) / 2 rows. Wide, shallow projects stay close to linear.
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+')
+    ancestor = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='+')
+    descendant = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='+')
+
+    @classmethod
+    def reaches(cls, ancestor_id, descendant_id):
+        """Whether `ancestor_id` is upstream of `descendant_id`, in one indexed lookup"""
+        return cls.objects.filter(ancestor=ancestor_id, descendant=descendant_id).exists()
+
+    class Meta:
+        unique_together = ['ancestor', 'descendant']
+        indexes = [
+            # Ancestors of a task: edge inserts and subgraph rebuilds
+            models.Index(fields=['descendant', 'ancestor'], name='reach_descendant_idx'),
+        ]
+
 class ProjectCollaborator(models.Model):
     ROLES = [('EDIT', 'Editor'), ('VIEW', 'Viewer'), ('ADMIN', 'Project Admin')]
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='collaborators')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='collaborations')
     role = models.CharField(max_length=5, choices=ROLES, default='VIEW')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Stored project, so a move can resync the project it left
+        instance._stored_project_id = instance.__dict__.get('project_id')
+        return instance
+
+    class Meta:
+        unique_together = ['project', 'user']
+
+class ProjectAccess(models.Model):
+    """Materialized (user, project) grants for creators and collaborators"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='project_access')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='access')
+
     class Meta:
-        unique_together = ['project', 'user']
\ No newline at end of file
+        unique_together = ['user', 'project']
\ No newline at end of file
@@ -0,0 +1,10 @@
+# api/pagination.py
+from rest_framework.pagination import CursorPagination
+
+class IdCursorPagination(CursorPagination):
+    """Keyset pagination on the primary key, so deep pages cost the same as
+    the first one. Newest rows come first."""
+    ordering = '-id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
@@ -0,0 +1,55 @@
+# api/profiling.py
+import io
+import os
+import pstats
+import re
+import uuid
+from pathlib import Path
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils import timezone
+from rest_framework import permissions
+from rest_framework.views import APIView
+
+DEFAULTS = {
+    'DIRECTORY': Path(settings.BASE_DIR) / 'profiles',
+    'MAX_FILES': 50,
+    'QUERY_PARAM': 'profile',
+    'HEADER': 'HTTP_X_PROFILE',
+}
+
+PROFILE_NAME = re.compile(r'^[\w.-]+\.prof$')
+
+def profiling_settings():
+    return {**DEFAULTS, **getattr(settings, 'PROFILING', {})}
+
+def save_profile(profiler, label):
+    """Dump a profiler's stats to the profile directory and return the file name.
+
+    Only the newest MAX_FILES profiles are kept.
+    """
+    config = profiling_settings()
+    directory = Path(config['DIRECTORY'])
+    directory.mkdir(parents=True, exist_ok=True)
+    safe_label = re.sub(r'[^\w-]+', '_', label)[:60]
+    name = f"{timezone.now():%Y%m%dT%H%M%S}-{safe_label}-{uuid.uuid4().hex[:8]}.prof"
+    profiler.dump_stats(directory / name)
+
+    profiles = sorted(directory.glob('*.prof'), key=os.path.getmtime)
+    for stale in profiles[:-config['MAX_FILES']]:
+        stale.unlink(missing_ok=True)
+    return name
+
+class ProfileView(APIView):
+    """Download a stored profile (pstats), or `?summary=1` for a text summary"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, name):
+        path = Path(profiling_settings()['DIRECTORY']) / name
+        if not PROFILE_NAME.match(name) or not path.is_file():
+            raise Http404
+        if request.query_params.get('summary'):
+            out = io.StringIO()
+            pstats.Stats(str(path), stream=out).sort_stats('cumulative').print_stats(40)
+            return HttpResponse(out.getvalue(), content_type='text/plain; charset=utf-8')
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=name)
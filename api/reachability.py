@@ -0,0 +1,96 @@
+# api/reachability.py
+"""Incremental maintenance of the TaskReachability index.
+
+An edge depends_on -> task makes every ancestor of depends_on (and
+depends_on itself) reach task and all of its descendants, so inserts only
+add that product. Removing an edge can only shrink the ancestor sets of
+task and its descendants, so deletes recompute just those rows from the
+remaining edges.
+
+Inserting an edge can add up to |ancestors| * |descendants| rows, and the
+index as a whole is bounded by the number of ancestor-descendant pairs:
+n * (n - 1) / 2 for a project whose n tasks form one chain.
+"""
+from collections import defaultdict, deque
+from .models import Task, Dependency, TaskReachability
+
+INDEX_BATCH_SIZE = 500
+
+def _chunks(ids):
+    ids = list(ids)
+    for i in range(0, len(ids), INDEX_BATCH_SIZE):
+        yield ids[i:i + INDEX_BATCH_SIZE]
+
+def _create(project_id, pairs):
+    TaskReachability.objects.bulk_create(
+        [TaskReachability(project_id=project_id, ancestor_id=a, descendant_id=d) for a, d in pairs],
+        batch_size=INDEX_BATCH_SIZE, ignore_conflicts=True
+    )
+
+def ancestors_of(task_id):
+    return set(TaskReachability.objects.filter(descendant=task_id).values_list('ancestor_id', flat=True))
+
+def descendants_of(task_id):
+    return set(TaskReachability.objects.filter(ancestor=task_id).values_list('descendant_id', flat=True))
+
+def add_edge(project_id, depends_on_id, task_id):
+    """Close the index over a new dependency of `task_id` on `depends_on_id`"""
+    sources = ancestors_of(depends_on_id) | {depends_on_id}
+    targets = descendants_of(task_id) | {task_id}
+    _create(project_id, ((a, d) for a in sources for d in targets))
+
+def remove_edge(project_id, depends_on_id, task_id):
+    """Recompute the ancestors of `task_id` and its descendants after an edge left"""
+    if Dependency.objects.filter(depends_on=depends_on_id, group__task=task_id).exists():
+        return  # still linked through another group
+    reindex_tasks(project_id, descendants_of(task_id) | {task_id})
+
+def rebuild_project(project_id):
+    """Recompute the whole index of a project from its dependencies"""
+    reindex_tasks(project_id, Task.objects.filter(project=project_id).values_list('id', flat=True))
+
+def reindex_tasks(project_id, task_ids):
+    """Recompute the ancestor rows of `task_ids`, a set closed under descendants.
+
+    Ancestors outside the set keep their rows and are read back once, so
+    the cost is bounded by the affected nodes and their incoming edges.
+    """
+    task_ids = set(task_ids)
+    predecessors = defaultdict(set)
+    for chunk in _chunks(task_ids):
+        TaskReachability.objects.filter(descendant__in=chunk).delete()
+        edges = Dependency.objects.filter(group__task__in=chunk).values_list(
+            'depends_on_id', 'group__task_id'
+        )
+        for depends_on_id, dependent_id in edges:
+            predecessors[dependent_id].add(depends_on_id)
+
+    ancestors = defaultdict(set)
+    outside = {p for preds in predecessors.values() for p in preds} - task_ids
+    for chunk in _chunks(outside):
+        rows = TaskReachability.objects.filter(descendant__in=chunk).values_list(
+            'ancestor_id', 'descendant_id'
+        )
+        for ancestor_id, descendant_id in rows:
+            ancestors[descendant_id].add(ancestor_id)
+
+    # Kahn's algorithm over the affected set; inner edges only
+    successors = defaultdict(list)
+    in_degree = dict.fromkeys(task_ids, 0)
+    for dependent_id, preds in predecessors.items():
+        for p in preds & task_ids:
+            successors[p].append(dependent_id)
+            in_degree[dependent_id] += 1
+    queue = deque(tid for tid, degree in in_degree.items() if degree == 0)
+    pairs = []
+    while queue:
+        current = queue.popleft()
+        for p in predecessors[current]:
+            ancestors[current].add(p)
+            ancestors[current] |= ancestors[p]
+        pairs.extend((a, current) for a in ancestors[current])
+        for neighbor in successors[current]:
+            in_degree[neighbor] -= 1
+            if in_degree[neighbor] == 0:
+                queue.append(neighbor)
+    _create(project_id, pairs)
@@ -0,0 +1,61 @@
+# api/renderers.py
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # optional C-accelerated encoder
+    orjson = None
+
+STREAM_CHUNK_SIZE = 500
+
+_fallback_encoder = encoders.JSONEncoder(separators=(',', ':'), ensure_ascii=False)
+
+def dumps(data):
+    """Compact JSON bytes, via orjson when it is installed"""
+    if orjson is not None:
+        ret = orjson.dumps(
+            data, default=_fallback_encoder.default, option=orjson.OPT_NON_STR_KEYS
+        )
+        # Same javascript-safe escaping as DRF's JSONRenderer
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+    ret = _fallback_encoder.encode(data)
+    return ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes compact output with orjson when available.
+
+    Indented output (browsable API, `; indent=` media types) and the
+    non-compact or ASCII-only settings still go through the stdlib encoder.
+    orjson never emits NaN/Infinity, so output is always strict JSON.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+def wants_stream(request):
+    return request.query_params.get('stream', '').lower() in ['1', 'true']
+
+def stream_json_array(items):
+    """Yield a JSON array one encoded item at a time"""
+    yield b'['
+    for index, item in enumerate(items):
+        yield dumps(item) if index == 0 else b',' + dumps(item)
+    yield b']'
+
+def stream_json_object(pairs):
+    """Yield a JSON object from (key, value) pairs one member at a time"""
+    yield b'{'
+    for index, (key, value) in enumerate(pairs):
+        member = dumps(str(key)) + b':' + dumps(value)
+        yield member if index == 0 else b',' + member
+    yield b'}'
+
+def streaming_json_response(chunks):
+    return StreamingHttpResponse(chunks, content_type='application/json')
@@ -0,0 +1,110 @@
+# api/schedule_cache.py
+from datetime import date
+from django.core.cache import cache
+from .critical_path import UNREACHED, analyze_graph
+from .graph import load_project_graph
+from .models import Task
+from .renderers import STREAM_CHUNK_SIZE
+from .schedule_queue import recalculate_project
+
+SCHEDULE_CACHE_TIMEOUT = 60 * 60
+
+def schedule_cache_key(project, kind='schedule'):
+    """Cache key tied to the project's graph version; edits invalidate it.
+
+    Schedules also depend on the assignees' work in other projects, so
+    their key carries the bookings version too.
+    """
+    key = f'{kind}:{project.pk}:{project.graph_version}'
+    return f'{key}:{project.bookings_version}' if kind == 'schedule' else key
+
+def _ensure_scheduled(project):
+    """Recalculate when the graph or the outside bookings moved since the last run"""
+    key = f'bookings:{project.pk}'
+    if not project.schedule_is_fresh or cache.get(key) != project.bookings_version:
+        recalculate_project(project)
+        cache.set(key, project.bookings_version, SCHEDULE_CACHE_TIMEOUT)
+
+def iter_schedule(project):
+    """(task_id, entry) pairs read from the stored dates in chunks"""
+    rows = Task.objects.filter(project=project).values_list(
+        'id', 'title', 'start_date', 'end_date', 'assigned_to__username'
+    ).iterator(chunk_size=STREAM_CHUNK_SIZE)
+    for task_id, title, start_date, end_date, username in rows:
+        yield str(task_id), {
+            'title': title,
+            'start': start_date.isoformat() if start_date else None,
+            'end': end_date.isoformat() if end_date else None,
+            'assigned_to': username
+        }
+
+def serialize_schedule(project):
+    """Response payload built from the stored task dates"""
+    return dict(iter_schedule(project))
+
+def stream_project_schedule(project):
+    """Like get_project_schedule, but yields entries without caching them"""
+    _ensure_scheduled(project)
+    return iter_schedule(project)
+
+def get_project_schedule(project):
+    """Serialized schedule for the project's graph and bookings versions.
+
+    Served from the cache when neither changed. Otherwise the schedule is
+    recalculated only if it is stale, then serialized and cached under the
+    new key.
+    """
+    key = schedule_cache_key(project)
+    payload = cache.get(key)
+    if payload is None:
+        _ensure_scheduled(project)
+        payload = serialize_schedule(project)
+        cache.set(key, payload, SCHEDULE_CACHE_TIMEOUT)
+    return payload
+
+def get_project_graph(project):
+    """ProjectGraph of the project's current graph version, loaded once"""
+    key = schedule_cache_key(project, 'graph')
+    graph = cache.get(key)
+    if graph is None:
+        graph = load_project_graph(project)
+        cache.set(key, graph, SCHEDULE_CACHE_TIMEOUT)
+    return graph
+
+def serialize_critical_path(project, graph):
+    """Earliest/latest dates and total float per task, plus the critical chain"""
+    es, ef, ls, lf = analyze_graph(graph)
+    origin = project.start_date.toordinal()
+    iso = lambda offset: date.fromordinal(origin + int(offset)).isoformat()
+    tasks = {}
+    critical = []
+    for i, task_id in enumerate(graph.ids):
+        if es[i] == UNREACHED:
+            tasks[str(task_id)] = None  # on a cycle or behind another project
+            continue
+        total_float = int(ls[i] - es[i])
+        tasks[str(task_id)] = {
+            'earliest_start': iso(es[i]),
+            'earliest_finish': iso(ef[i]),
+            'latest_start': iso(ls[i]),
+            'latest_finish': iso(lf[i]),
+            'total_float': total_float,
+            'critical': total_float == 0,
+        }
+        if total_float == 0:
+            critical.append((int(es[i]), int(ef[i]), task_id))
+    ends = [int(ef[i]) for i in range(len(graph)) if ef[i] != UNREACHED]
+    return {
+        'project_end': iso(max(ends)) if ends else None,
+        'critical_path': [task_id for _, _, task_id in sorted(critical)],
+        'tasks': tasks,
+    }
+
+def get_critical_path(project):
+    """Critical path analysis for the current graph version, cached like the schedule"""
+    key = schedule_cache_key(project, 'critical_path')
+    payload = cache.get(key)
+    if payload is None:
+        payload = serialize_critical_path(project, get_project_graph(project))
+        cache.set(key, payload, SCHEDULE_CACHE_TIMEOUT)
+    return payload
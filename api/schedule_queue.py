@@ -0,0 +1,118 @@
+# api/schedule_queue.py
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Project
+from .scheduling import calculate_project_schedule, reschedule_downstream
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ASYNC': True,
+    'DEBOUNCE_SECONDS': 1.0,
+}
+
+def queue_settings():
+    return {**DEFAULTS, **getattr(settings, 'SCHEDULE_QUEUE', {})}
+
+def recalculate_project(project, task_ids=None):
+    """Reschedule a project and record the graph version the result covers"""
+    version = project.graph_version
+    if task_ids:
+        schedule = reschedule_downstream(project, task_ids)
+    else:
+        schedule = calculate_project_schedule(project)
+    Project.objects.filter(pk=project.pk).update(
+        scheduled_version=version, updated_at=timezone.now()
+    )
+    project.scheduled_version = version
+    return schedule
+
+class ScheduleQueue:
+    """Coalesces dirty projects and recalculates each once per debounce window.
+
+    A project marked dirty several times inside one window is rescheduled
+    once. If every mark named the changed tasks, the run is incremental
+    over their union; otherwise the whole project is recalculated.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending = {}  # project_id -> [deadline, task_ids or None]
+        self._thread = None
+
+    def mark_dirty(self, project_id, task_ids=None):
+        conf = queue_settings()
+        if not conf['ASYNC']:
+            self._run(project_id, set(task_ids) if task_ids else None)
+            return
+
+        with self._cond:
+            entry = self._pending.get(project_id)
+            if entry is None:
+                deadline = time.monotonic() + conf['DEBOUNCE_SECONDS']
+                self._pending[project_id] = [deadline, set(task_ids) if task_ids else None]
+            elif entry[1] is not None:
+                entry[1] = entry[1] | set(task_ids) if task_ids else None
+            self._ensure_worker()
+            self._cond.notify()
+
+    def is_pending(self, project_id):
+        with self._cond:
+            return project_id in self._pending
+
+    def flush(self):
+        """Run every pending recalculation now, in the calling thread"""
+        with self._cond:
+            jobs = list(self._pending.items())
+            self._pending.clear()
+        for project_id, (_, task_ids) in jobs:
+            self._run(project_id, task_ids)
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._work, name='schedule-queue', daemon=True
+            )
+            self._thread.start()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    due = [pid for pid, (deadline, _) in self._pending.items() if deadline <= now]
+                    if due:
+                        break
+                    next_deadline = min((d for d, _ in self._pending.values()), default=None)
+                    self._cond.wait(None if next_deadline is None else next_deadline - now)
+                jobs = [(pid, self._pending.pop(pid)[1]) for pid in due]
+
+            for project_id, task_ids in jobs:
+                try:
+                    self._run(project_id, task_ids)
+                except Exception:
+                    logger.exception("Schedule recalculation failed for project %s", project_id)
+                finally:
+                    close_old_connections()
+
+    def _run(self, project_id, task_ids):
+        project = Project.objects.filter(pk=project_id).first()
+        if project is not None:  # may have been deleted meanwhile
+            recalculate_project(project, task_ids)
+
+schedule_queue = ScheduleQueue()
+
+def bump_graph_version(project_id):
+    Project.objects.filter(pk=project_id).update(
+        graph_version=F('graph_version') + 1, updated_at=timezone.now()
+    )
+
+def mark_project_dirty(project_id, task_ids=None):
+    """Bump the project's graph version and queue a recalculation on commit"""
+    bump_graph_version(project_id)
+    transaction.on_commit(lambda: schedule_queue.mark_dirty(project_id, task_ids))
@@ -1,122 +1,252 @@
 # api/scheduling.py
 from datetime import date, timedelta
 from collections import defaultdict, deque
-from .models import Task, DependencyGroup
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .graph import (
+    NO_USER, GraphSchedule, changed_dates, level_graph, load_portfolio_graph, load_project_graph,
+    schedule_graph
+)
+from .metrics import span
+from .models import Project, Task, Dependency, DependencyGroup, TaskReachability
 
-# NEW FUNCTION ADDED FOR PROJECT SWITCHING LOGIC
-def handle_multiple_projects(user):
-    """Determine if user is already working on another project"""
-    current_tasks = user.assigned_tasks.filter(is_completed=False)
-    return current_tasks.first().project if current_tasks.exists() else None
+PERSIST_BATCH_SIZE = 500
 
+@span('scheduling.persist_dates')
+def persist_dates(rows):
+    """Write (task_id, start_date, end_date) rows in bulk without firing Task signals.
+
+    Returns the number of rows written.
+    """
+    now = timezone.now()
+    changed = [
+        Task(pk=task_id, start_date=start, end_date=end, updated_at=now)
+        for task_id, start, end in rows
+    ]
+    if changed:
+        # bulk_update issues no post_save, so no handler re-enters scheduling
+        with transaction.atomic():
+            Task.objects.bulk_update(
+                changed, ['start_date', 'end_date', 'updated_at'],
+                batch_size=PERSIST_BATCH_SIZE
+            )
+    return len(changed)
+
+def persist_schedule(schedule, previous):
+    """Write the entries of a schedule dict whose dates changed.
+
+    `previous` maps task_id -> (start_date, end_date) as currently stored.
+    Returns the number of rows written.
+    """
+    return persist_dates(
+        (task_id, dates['start'], dates['end'])
+        for task_id, dates in schedule.items()
+        if previous.get(task_id) != (dates['start'], dates['end'])
+    )
+
+def build_availability_index(user_ids, exclude_project=None):
+    """Busy intervals of each user across projects, loaded in one query.
+
+    Returns {user_id: [(start_date, end_date), ...]} sorted by start, built
+    from the users' open, already scheduled tasks.
+    """
+    tasks = Task.objects.filter(
+        assigned_to__in=user_ids,
+        is_completed=False,
+        start_date__isnull=False,
+        end_date__isnull=False,
+    )
+    if exclude_project is not None:
+        tasks = tasks.exclude(project=exclude_project)
+
+    busy = defaultdict(list)
+    rows = tasks.order_by('assigned_to_id', 'start_date').values_list(
+        'assigned_to_id', 'start_date', 'end_date'
+    )
+    for user_id, start_date, end_date in rows:
+        busy[user_id].append((start_date, end_date))
+    return busy
+
+def bump_bookings_version(user_ids, exclude_project=None):
+    """Retire the cached schedules of projects that book any of `user_ids`.
+
+    Those schedules read the users' tasks in other projects through
+    build_availability_index, which no graph_version covers.
+    """
+    user_ids = set(user_ids) - {None}
+    if not user_ids:
+        return
+    projects = Project.objects.filter(
+        pk__in=Task.objects.filter(assigned_to__in=user_ids).values('project')
+    )
+    if exclude_project is not None:
+        projects = projects.exclude(pk=exclude_project)
+    projects.update(bookings_version=F('bookings_version') + 1)
+
+@span('scheduling.calculate_project_schedule')
 def calculate_project_schedule(project):
-    # Initialize data structures
-    tasks = Task.objects.filter(project=project).prefetch_related(
-        'dependency_groups__dependencies__depends_on',
-        'assigned_to'
+    """Schedule every task of a project and persist the dates that moved.
+
+    Loading, the scheduling pass and persistence are separate steps over a
+    compact ProjectGraph (see api/graph.py). Returns a read-only
+    {task_id: {'start', 'end', 'user'}} mapping.
+    """
+    graph = load_project_graph(project)
+    # Bookings the assignees already hold in other projects
+    busy = build_availability_index(graph.user_ids(), exclude_project=project)
+    start, end = schedule_graph(graph, project.start_date, busy)
+    changed = list(changed_dates(graph, start, end))
+    persist_dates(changed)
+    if changed:
+        index = graph.index()
+        moved_users = {graph.users[index[task_id]] for task_id, _, _ in changed} - {NO_USER}
+        bump_bookings_version(moved_users, exclude_project=project.pk)
+    return GraphSchedule(graph, start, end)
+
+def portfolio_project_ids(user_ids):
+    """Projects sharing assignees with `user_ids`, closed over shared users.
+
+    Alternates between the projects the users work in and the users
+    assigned in those projects until neither set grows.
+    """
+    user_ids = set(user_ids)
+    project_ids = set()
+    new_users = set(user_ids)
+    while new_users:
+        new_projects = set(Task.objects.filter(assigned_to__in=new_users).values_list(
+            'project_id', flat=True
+        ).distinct()) - project_ids
+        if not new_projects:
+            break
+        project_ids |= new_projects
+        new_users = set(Task.objects.filter(
+            project__in=new_projects, assigned_to__isnull=False
+        ).values_list('assigned_to_id', flat=True).distinct()) - user_ids
+        user_ids |= new_users
+    return project_ids
+
+@span('scheduling.schedule_portfolio')
+def schedule_portfolio(user_ids):
+    """Resource-level every project that shares assignees with `user_ids`.
+
+    The projects are loaded into one ProjectGraph and scheduled together
+    with level_graph, so each user's work across projects never overlaps.
+    Changed dates are persisted, and each project not edited meanwhile moves
+    to a new graph version that is marked scheduled, which retires cached
+    schedules and ETags. Returns the scheduled project ids.
+    """
+    project_ids = portfolio_project_ids(user_ids)
+    if not project_ids:
+        return set()
+    projects = Project.objects.filter(pk__in=project_ids).values_list(
+        'id', 'start_date', 'graph_version'
+    )
+    origins, versions = {}, defaultdict(list)
+    for project_id, start_date, version in projects:
+        origins[project_id] = start_date.toordinal()
+        versions[version].append(project_id)
+
+    # Closed over shared users, so no project outside it books these users
+    graph = load_portfolio_graph(project_ids)
+    start, end = level_graph(graph, origins)
+    with transaction.atomic():
+        persist_dates(changed_dates(graph, start, end))
+        now = timezone.now()
+        for version, ids in versions.items():
+            Project.objects.filter(pk__in=ids, graph_version=version).update(
+                graph_version=version + 1, scheduled_version=version + 1, updated_at=now
+            )
+    return project_ids
+
+@span('scheduling.reschedule_downstream')
+def reschedule_downstream(project, task_ids):
+    """Incrementally reschedule only the tasks downstream of `task_ids`.
+
+    The downstream closure comes from the reachability index, so only the
+    affected tasks, their incoming edges and their direct dependencies are
+    loaded. Dates are recomputed in topological order, and propagation
+    stops along edges whose source dates did not change. Falls back to a
+    full `calculate_project_schedule` when the stored schedule is
+    incomplete, the subgraph has a cycle or it holds assigned tasks, since
+    assignees are booked in the full pass's global order. Callers take the
+    full pass themselves when a task's assignee changed.
+    Returns {task_id: {'start', 'end', 'user'}} for the tasks that moved.
+    """
+    seeds = set(task_ids)
+    affected = seeds | set(TaskReachability.objects.filter(
+        ancestor__in=seeds
+    ).values_list('descendant_id', flat=True))
+    edges = Dependency.objects.filter(group__task__in=affected).values_list(
+        'depends_on_id', 'group__task_id', 'group_id', 'group__logic_type'
     )
-    task_map = {task.id: task for task in tasks}
-    schedule = {}
-    
-    # Track user availability {user_id: next_available_date}
-    user_availability = defaultdict(lambda: project.start_date)
-    
-    # Build dependency graph and in-degree count
-    graph = defaultdict(list)
-    in_degree = defaultdict(int)
-    task_order = []
-
-    # Kahn's algorithm for topological sort
-    for task in tasks:
-        deps = []
-        for group in task.dependency_groups.all():
-            deps.extend([d.depends_on_id for d in group.dependencies.all()])
-        
-        for dep_id in deps:
-            graph[dep_id].append(task.id)
-            in_degree[task.id] += 1
-        
-        if not deps:  # Tasks without dependencies
-            task_order.append(task.id)
-    
-    # Initialize queue with tasks having no dependencies
-    queue = deque([tid for tid in task_map if in_degree[tid] == 0])
-    
+
+    successors = defaultdict(set)
+    groups = defaultdict(dict)  # task_id -> {group_id: (logic_type, [dep ids])}
+    for dep_id, task_id, group_id, logic_type in edges:
+        successors[dep_id].add(task_id)
+        groups[task_id].setdefault(group_id, (logic_type, []))[1].append(dep_id)
+
+    # Lightweight rows for the closure and the tasks feeding it
+    rows = {
+        tid: {'duration': duration, 'user': user_id, 'start': start, 'end': end}
+        for tid, duration, user_id, start, end in Task.objects.filter(
+            project=project, pk__in=affected.union(successors)
+        ).values_list('id', 'duration_days', 'assigned_to_id', 'start_date', 'end_date')
+    }
+    seeds = {tid for tid in seeds if tid in rows}
+    affected = {tid for tid in affected if tid in rows}
+
+    # Every task in or feeding the frontier must already be scheduled
+    for tid in affected:
+        if rows[tid]['start'] is None and tid not in seeds:
+            return calculate_project_schedule(project)
+        for _, dep_ids in groups[tid].values():
+            if any(rows[d]['end'] is None for d in dep_ids if d not in affected):
+                return calculate_project_schedule(project)
+
+    # Kahn's algorithm restricted to the affected subgraph
+    in_degree = {tid: 0 for tid in affected}
+    for tid in affected:
+        for neighbor in successors[tid]:
+            in_degree[neighbor] += 1
+    queue = deque(tid for tid in affected if in_degree[tid] == 0)
+    order = []
     while queue:
         current_id = queue.popleft()
-        current_task = task_map[current_id]
-        
-        # Calculate earliest possible start date based on dependencies
-        dependency_start = project.start_date
-        for group in current_task.dependency_groups.all():
-            group_dates = []
-            for dependency in group.dependencies.all():
-                dep_task = dependency.depends_on
-                if dep_task.id in schedule:
-                    group_dates.append(schedule[dep_task.id]['end'])
-            
-            if group_dates:
-                if group.logic_type == 'AND':
-                    group_start = max(group_dates)
-                else:  # OR logic
-                    group_start = min(group_dates)
-                
-                dependency_start = max(dependency_start, group_start)
-        
-        # MODIFIED: Added project switching logic
-        user = current_task.assigned_to
-        if user:
-            current_project = handle_multiple_projects(user)
-            # Check if user is working on another project
-            if current_project and current_project != project:
-                # User is busy - can't start this task yet
-                user_start = user_availability[user.id]
-            else:
-                # User is available for this project
-                user_start = user_availability[user.id]
-        else:
-            # Unassigned task uses dependency start
-            user_start = dependency_start
-
-        # Calculate actual start date
-        start_date = max(dependency_start, user_start)
-        end_date = start_date + timedelta(days=current_task.duration_days)
-        
-        # Update schedule and user availability
-        schedule[current_id] = {
-            'start': start_date,
-            'end': end_date,
-            'user': user.id if user else None
-        }
-        
-        # MODIFIED: Only update availability if working on current project
-        if user and (not current_project or current_project == project):
-            user_availability[user.id] = end_date + timedelta(days=1)
-        
-        # Update topological sort
-        for neighbor in graph[current_id]:
+        order.append(current_id)
+        for neighbor in successors[current_id]:
             in_degree[neighbor] -= 1
             if in_degree[neighbor] == 0:
                 queue.append(neighbor)
-                task_order.append(neighbor)
-
-    # Handle tasks with circular dependencies (fallback)
-    for task in tasks:
-        if task.id not in schedule:
-            start_date = user_availability.get(task.assigned_to.id, project.start_date)
-            end_date = start_date + timedelta(days=task.duration_days)
-            schedule[task.id] = {
-                'start': start_date,
-                'end': end_date,
-                'user': task.assigned_to.id if task.assigned_to else None
-            }
-
-    # Update tasks with calculated dates
-    for task in tasks:
-        if task.id in schedule:
-            task_data = schedule[task.id]
-            task.start_date = task_data['start']
-            task.end_date = task_data['end']
-            task.save()
-
-    return schedule
\ No newline at end of file
+    if len(order) != len(affected):
+        return calculate_project_schedule(project)
+
+    # Assignees are booked in the full pass's global order, which a partial
+    # pass cannot reproduce, so only unassigned frontiers stay incremental
+    if any(rows[tid]['user'] for tid in affected):
+        return calculate_project_schedule(project)
+
+    dirty = set(seeds)
+    changes = {}
+    for current_id in order:
+        row = rows[current_id]
+        if current_id not in dirty:
+            continue  # no predecessor moved, so neither does this task
+
+        dependency_start = project.start_date
+        for logic_type, dep_ids in groups[current_id].values():
+            group_dates = [rows[d]['end'] for d in dep_ids]
+            group_start = max(group_dates) if logic_type == 'AND' else min(group_dates)
+            dependency_start = max(dependency_start, group_start)
+
+        start_date = dependency_start
+        end_date = start_date + timedelta(days=row['duration'])
+
+        if (start_date, end_date) != (row['start'], row['end']):
+            row['start'], row['end'] = start_date, end_date
+            changes[current_id] = {'start': start_date, 'end': end_date, 'user': row['user']}
+            dirty.update(successors[current_id])
+
+    persist_schedule(changes, {})
+    return changes
@@ -2,6 +2,21 @@ from rest_framework import serializers
 from django.utils import timezone
 from .models import Project, Task, Dependency, ProjectCollaborator, DependencyGroup
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Prefetch
+
+class EagerLoadingMixin:
+    """Relations a serializer reads, applied to querysets by the viewsets"""
+    select_related_fields = []
+    prefetch_related_fields = []
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        return queryset
 
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -17,11 +32,11 @@ class UserSerializer(serializers.ModelSerializer):
         )
         return user
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ['assigned_to']
+
     assigned_to = UserSerializer(read_only=True)
-    is_public = serializers.BooleanField(
-        source='is_private', 
-        read_only=True,
+    is_public = serializers.SerializerMethodField(
         help_text="Public status (inverse of is_private)"
     )
     
@@ -39,6 +54,9 @@ class TaskSerializer(serializers.ModelSerializer):
             'is_private': {'write_only': True}
         }
 
+    def get_is_public(self, obj):
+        return not obj.is_private
+
     # New Validation: Prevent Overloading Users
     def validate_assigned_to(self, value):
         if value:
@@ -53,23 +71,34 @@ class TaskSerializer(serializers.ModelSerializer):
     def validate(self, data):
         instance = self.instance
         if instance and data.get('is_completed', False):
-            if instance.subtasks.filter(is_completed=False).exists():
+            if instance.completed_subtask_count < instance.subtask_count:
                 raise serializers.ValidationError("All subtasks must be completed first")
             
             if not instance.can_start():
                 raise serializers.ValidationError("Dependencies not met")
         return data
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    # Only the ids of the reverse relations are rendered
+    prefetch_related_fields = [
+        Prefetch('tasks', queryset=Task.objects.only('id', 'project')),
+        Prefetch('collaborators', queryset=ProjectCollaborator.objects.only('id', 'project')),
+    ]
+
     is_public = serializers.BooleanField(default=True)
+    schedule_is_fresh = serializers.BooleanField(read_only=True)
     
     class Meta:
         model = Project
         fields = [
             'id', 'title', 'description', 'creator',
-            'start_date', 'is_public', 'tasks', 'collaborators'
+            'start_date', 'is_public', 'tasks', 'collaborators',
+            'graph_version', 'scheduled_version', 'schedule_is_fresh'
+        ]
+        read_only_fields = [
+            'creator', 'tasks', 'collaborators', 'start_date',
+            'graph_version', 'scheduled_version'
         ]
-        read_only_fields = ['creator', 'tasks', 'collaborators', 'start_date']
 
     def create(self, validated_data):
         # Automatically set the creator to the current user
@@ -81,12 +110,150 @@ class DependencySerializer(serializers.ModelSerializer):
         model = Dependency
         fields = '__all__'
 
+    def validate(self, data):
+        """Run the model checks: same project, no self reference, no cycle"""
+        dependency = Dependency(
+            group=data.get('group', getattr(self.instance, 'group', None)),
+            depends_on=data.get('depends_on', getattr(self.instance, 'depends_on', None))
+        )
+        try:
+            dependency.clean()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+        return data
+
 class DependencyGroupSerializer(serializers.ModelSerializer):
     class Meta:
         model = DependencyGroup
         fields = '__all__'
+        # Maintained by the dependency signals
+        read_only_fields = ['total_count', 'satisfied_count']
 
 class ProjectCollaboratorSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProjectCollaborator
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class BulkDependencyGroupSerializer(serializers.Serializer):
+    logic_type = serializers.ChoiceField(choices=DependencyGroup.LOGIC_TYPES)
+    depends_on = serializers.ListField(child=serializers.CharField(), allow_empty=False)
+
+class BulkTaskSerializer(serializers.Serializer):
+    ref = serializers.CharField(help_text="Client-side id, used by parent and depends_on")
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField(allow_blank=True, default='')
+    duration_days = serializers.IntegerField(min_value=1)
+    is_private = serializers.BooleanField(default=False)
+    parent = serializers.CharField(allow_null=True, default=None)
+    assigned_to = serializers.IntegerField(allow_null=True, default=None)
+    dependency_groups = BulkDependencyGroupSerializer(many=True, default=list)
+
+class BulkImportSerializer(serializers.Serializer):
+    """A whole task tree with dependency groups, validated in memory"""
+    tasks = BulkTaskSerializer(many=True, allow_empty=False)
+
+    def validate(self, data):
+        tasks = data['tasks']
+        by_ref = {spec['ref']: spec for spec in tasks}
+        if len(by_ref) != len(tasks):
+            raise serializers.ValidationError("Task refs must be unique")
+
+        assignees = [spec['assigned_to'] for spec in tasks if spec['assigned_to'] is not None]
+        user_ids = set(assignees)
+        known_users = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+        if user_ids - known_users:
+            raise serializers.ValidationError(f"Unknown users: {sorted(user_ids - known_users)}")
+        self._check_assignees(assignees)
+
+        data['levels'] = self._parent_levels(by_ref)
+        self._check_dependencies(by_ref)
+        return data
+
+    def _check_assignees(self, assignees):
+        """TaskSerializer.validate_assigned_to for the whole payload at once"""
+        # Each imported task is pending, so a user may appear only once
+        repeated = {user_id for user_id in assignees if assignees.count(user_id) > 1}
+        busy = repeated | set(Task.objects.filter(
+            assigned_to__in=assignees, is_completed=False,
+            end_date__gte=timezone.now().date()
+        ).values_list('assigned_to_id', flat=True))
+        if busy:
+            raise serializers.ValidationError(f"User has pending tasks: {sorted(busy)}")
+
+    def _parent_levels(self, by_ref):
+        """Refs grouped by subtask depth, parents first"""
+        depth = {}
+        for ref in by_ref:
+            chain = []
+            current = ref
+            while current is not None and current not in depth:
+                if current in chain:
+                    raise serializers.ValidationError("Subtask parents form a cycle")
+                if current not in by_ref:
+                    raise serializers.ValidationError(f"Unknown parent ref: {current}")
+                chain.append(current)
+                current = by_ref[current]['parent']
+            base = depth[current] + 1 if current is not None else 0
+            for offset, node in enumerate(reversed(chain)):
+                depth[node] = base + offset
+
+        levels = [[] for _ in range(max(depth.values()) + 1)]
+        for ref, level in depth.items():
+            levels[level].append(ref)
+        return levels
+
+    def _check_dependencies(self, by_ref):
+        """Reject unknown or self references and dependency cycles"""
+        successors = {ref: [] for ref in by_ref}
+        in_degree = dict.fromkeys(by_ref, 0)
+        for ref, spec in by_ref.items():
+            logic_types = [group['logic_type'] for group in spec['dependency_groups']]
+            if len(set(logic_types)) != len(logic_types):
+                raise serializers.ValidationError(f"Task {ref} repeats a dependency group type")
+            for group in spec['dependency_groups']:
+                if len(set(group['depends_on'])) != len(group['depends_on']):
+                    raise serializers.ValidationError(f"Task {ref} repeats a dependency")
+                for dep in group['depends_on']:
+                    if dep not in by_ref:
+                        raise serializers.ValidationError(f"Unknown dependency ref: {dep}")
+                    if dep == ref:
+                        raise serializers.ValidationError("Task cannot depend on itself!")
+                    successors[dep].append(ref)
+                    in_degree[ref] += 1
+
+        # Kahn's algorithm; leftovers sit on a cycle
+        queue = [ref for ref, degree in in_degree.items() if degree == 0]
+        visited = 0
+        while queue:
+            current = queue.pop()
+            visited += 1
+            for neighbor in successors[current]:
+                in_degree[neighbor] -= 1
+                if in_degree[neighbor] == 0:
+                    queue.append(neighbor)
+        if visited != len(by_ref):
+            raise serializers.ValidationError("Dependencies form a cycle")
+
+class SimulationEditSerializer(serializers.Serializer):
+    """One hypothetical change to a task; unset fields are left as they are"""
+    task = serializers.IntegerField()
+    duration_days = serializers.IntegerField(min_value=1, required=False)
+    extra_days = serializers.IntegerField(required=False, help_text="Added to the duration")
+    assigned_to = serializers.IntegerField(allow_null=True, required=False)
+
+    def validate(self, data):
+        if len(data) == 1:
+            raise serializers.ValidationError("An edit must change duration_days, extra_days or assigned_to")
+        if 'duration_days' in data and 'extra_days' in data:
+            raise serializers.ValidationError("Use either duration_days or extra_days")
+        return data
+
+class SimulationSerializer(serializers.Serializer):
+    edits = SimulationEditSerializer(many=True, allow_empty=False)
+
+    def validate_edits(self, edits):
+        user_ids = {edit['assigned_to'] for edit in edits if edit.get('assigned_to')}
+        known_users = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+        if user_ids - known_users:
+            raise serializers.ValidationError(f"Unknown users: {sorted(user_ids - known_users)}")
+        return edits
@@ -1,57 +1,364 @@
 # api/signals.py
-from django.db.models.signals import post_save
+from django.db.models import Count, F, Q
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Task, Dependency, DependencyGroup, ProjectCollaborator
-from .scheduling import calculate_project_schedule
+from django.utils import timezone
+from .models import (
+    Project, Task, Dependency, DependencyGroup, ProjectCollaborator, ProjectAccess,
+    TaskReachability, tasks_started, subtree_deleted, deleting_subtree
+)
+from .metrics import span
+from . import reachability
+from .schedule_queue import mark_project_dirty
+from .scheduling import bump_bookings_version
 
 @receiver(post_save, sender=Task)
-def handle_task_updates(sender, instance, **kwargs):
-    """NEW: Enhanced parent task status management"""
+@span('signals.update_readiness_counters')
+def update_readiness_counters(sender, instance, created, **kwargs):
+    """Adjust satisfied counts of the groups this task feeds when it flips"""
+    # Must run before handle_task_updates, which reads readiness
+    previous = getattr(instance, '_stored', {}).get('is_completed')
+    if created or previous == instance.is_completed:
+        return
+    if previous is None:
+        # Completion state was never loaded, so recount instead of adjusting
+        refresh_readiness_counters(
+            DependencyGroup.objects.filter(dependencies__depends_on=instance)
+        )
+    else:
+        adjust_readiness_counters(instance.pk, instance.is_completed)
+
+def adjust_readiness_counters(task_id, completed):
+    """Move the satisfied counts of the groups a task feeds by one"""
+    DependencyGroup.objects.filter(dependencies__depends_on=task_id).update(
+        satisfied_count=F('satisfied_count') + (1 if completed else -1)
+    )
+
+def refresh_readiness_counters(groups):
+    """Recount total and satisfied dependencies for the given groups"""
+    groups = list(groups.annotate(
+        total=Count('dependencies'),
+        satisfied=Count('dependencies', filter=Q(dependencies__depends_on__is_completed=True))
+    ))
+    for group in groups:
+        group.total_count = group.total
+        group.satisfied_count = group.satisfied
+    DependencyGroup.objects.bulk_update(groups, ['total_count', 'satisfied_count'])
+
+@receiver(post_save, sender=Dependency)
+@span('signals.count_new_dependency')
+def count_new_dependency(sender, instance, created, **kwargs):
+    if created:
+        DependencyGroup.objects.filter(pk=instance.group_id).update(
+            total_count=F('total_count') + 1,
+            satisfied_count=F('satisfied_count') + int(instance.depends_on.is_completed)
+        )
+    else:
+        previous = getattr(instance, '_stored_group_id', None)
+        refresh_readiness_counters(
+            DependencyGroup.objects.filter(pk__in={instance.group_id, previous} - {None})
+        )
+
+@receiver(post_delete, sender=Dependency)
+@span('signals.uncount_deleted_dependency')
+def uncount_deleted_dependency(sender, instance, **kwargs):
+    if deleting_subtree.get():
+        return  # handle_subtree_deleted recounts the groups once
+    refresh_readiness_counters(DependencyGroup.objects.filter(pk=instance.group_id))
+
+@receiver(post_save, sender=Dependency)
+@span('signals.index_dependency')
+def index_dependency(sender, instance, created, **kwargs):
+    """Extend the reachability index over a new edge, or move an edited one"""
+    # Runs after count_new_dependency, which reads the same stored group
+    previous = (
+        getattr(instance, '_stored_group_id', None), getattr(instance, '_stored_depends_on_id', None)
+    )
+    instance._stored_group_id = instance.group_id
+    instance._stored_depends_on_id = instance.depends_on_id
+    if not created and previous == (instance.group_id, instance.depends_on_id):
+        return
+    groups = {
+        pk: (task_id, project_id) for pk, task_id, project_id in DependencyGroup.objects.filter(
+            pk__in={instance.group_id, previous[0]} - {None}
+        ).values_list('pk', 'task_id', 'task__project_id')
+    }
+    task_id, project_id = groups[instance.group_id]
+    if not created:
+        if None in previous or previous[0] not in groups:
+            reachability.rebuild_project(project_id)
+            return
+        old_task_id, old_project_id = groups[previous[0]]
+        reachability.remove_edge(old_project_id, previous[1], old_task_id)
+    reachability.add_edge(project_id, instance.depends_on_id, task_id)
+
+@receiver(post_delete, sender=Dependency)
+@span('signals.unindex_dependency')
+def unindex_dependency(sender, instance, **kwargs):
+    if deleting_subtree.get():
+        return
+    # Groups and tasks are deleted after their dependencies in a cascade
+    row = DependencyGroup.objects.filter(pk=instance.group_id).values_list(
+        'task_id', 'task__project_id'
+    ).first()
+    if row:
+        reachability.remove_edge(row[1], instance.depends_on_id, row[0])
+
+@receiver(post_save, sender=DependencyGroup)
+@span('signals.reindex_moved_group')
+def reindex_moved_group(sender, instance, created, **kwargs):
+    """Move the index over a group's edges when the group changes task"""
+    previous = getattr(instance, '_stored_task_id', None)
+    instance._stored_task_id = instance.task_id
+    if created or previous == instance.task_id:
+        return
+    depends_on = list(instance.dependencies.values_list('depends_on_id', flat=True))
+    if not depends_on:
+        return
+    project_id = instance.task.project_id
+    if previous is None:
+        reachability.rebuild_project(project_id)
+        return
+    old_project_id = Task.objects.filter(pk=previous).values_list('project_id', flat=True).first()
+    if old_project_id:
+        reachability.reindex_tasks(old_project_id, reachability.descendants_of(previous) | {previous})
+    for depends_on_id in depends_on:
+        reachability.add_edge(project_id, depends_on_id, instance.task_id)
+
+@receiver(post_delete, sender=Task)
+@span('signals.unindex_deleted_task')
+def unindex_deleted_task(sender, instance, **kwargs):
+    """Drop index rows a cascade rebuilt for the task before it was deleted"""
+    if deleting_subtree.get():
+        return
+    TaskReachability.objects.filter(Q(ancestor=instance.pk) | Q(descendant=instance.pk)).delete()
+
+@receiver(post_save, sender=Task)
+@span('signals.handle_task_updates')
+def handle_task_updates(sender, instance, created, **kwargs):
+    """Start ready dependents and roll subtask transitions up to the parents"""
     # Update dependent tasks when marked completed
     if instance.is_completed:
         instance.update_dependent_tasks()
-    
-    # Parent task status rollback logic
-    if instance.parent_task:
-        parent = instance.parent_task
-        
-        # Calculate completion status
-        completed_subtasks = parent.subtasks.filter(is_completed=True).count()
-        total_subtasks = parent.subtasks.count()
-        all_completed = (completed_subtasks == total_subtasks)
-        
-        # Update parent completion status
-        parent.is_completed = all_completed
-        
-        # NEW: Determine parent status
-        if all_completed:
-            parent.status = 'COMPLETED'
-        else:
-            # Check if any subtask is in progress
-            if parent.subtasks.filter(status='IN_PROGRESS').exists():
+
+    stored = getattr(instance, '_stored', None)
+    if created or stored is None or None in (stored['is_completed'], stored['status']):
+        if instance.parent_task_id:
+            if created:
+                propagate_rollup(instance.parent_task_id, *_rollup_share(instance))
+            else:
+                recount_subtasks(instance.parent_task_id)
+        return
+
+    old_parent, new_parent = stored['parent_task_id'], instance.parent_task_id
+    old_share = _rollup_share(stored)
+    new_share = _rollup_share(instance)
+    if old_parent == new_parent:
+        if new_parent and old_share != new_share:
+            propagate_rollup(new_parent, *(n - o for n, o in zip(new_share, old_share)))
+    else:
+        # Reparented: leave the old chain, join the new one
+        if old_parent:
+            propagate_rollup(old_parent, *(-o for o in old_share))
+        if new_parent:
+            propagate_rollup(new_parent, *new_share)
+
+@receiver(post_delete, sender=Task)
+@span('signals.rollup_deleted_subtask')
+def rollup_deleted_subtask(sender, instance, **kwargs):
+    if instance.parent_task_id and not deleting_subtree.get():
+        propagate_rollup(instance.parent_task_id, *(-o for o in _rollup_share(instance)))
+
+@receiver(subtree_deleted)
+@span('signals.handle_subtree_deleted')
+def handle_subtree_deleted(sender, root, group_ids, downstream_ids, assignee_ids, **kwargs):
+    """Apply a subtree delete once: index, readiness, rollup and schedule"""
+    if downstream_ids:
+        reachability.reindex_tasks(root['project_id'], downstream_ids)
+    if group_ids:
+        refresh_readiness_counters(DependencyGroup.objects.filter(pk__in=group_ids))
+    if root['parent_task_id']:
+        propagate_rollup(root['parent_task_id'], *(-o for o in _rollup_share(root)))
+    mark_project_dirty(root['project_id'])
+    bump_bookings_version(assignee_ids, exclude_project=root['project_id'])
+
+@receiver(tasks_started)
+@span('signals.rollup_started_tasks')
+def rollup_started_tasks(sender, task_ids, **kwargs):
+    """Bulk-started tasks bypass post_save, so roll their parents up here"""
+    parents = Task.objects.filter(
+        pk__in=task_ids, parent_task__isnull=False
+    ).values('parent_task').annotate(started=Count('id'))
+    for row in parents:
+        propagate_rollup(row['parent_task'], in_progress=row['started'])
+
+def _rollup_share(task):
+    """(total, completed, in_progress) contribution of a task to its parent"""
+    if isinstance(task, dict):
+        return (1, int(task['is_completed']), int(task['status'] == 'IN_PROGRESS'))
+    return (1, int(task.is_completed), int(task.status == 'IN_PROGRESS'))
+
+def recount_subtasks(parent_id):
+    """Rebuild a parent's rollup counters from its subtasks, then propagate"""
+    counts = Task.objects.filter(parent_task=parent_id).aggregate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(is_completed=True)),
+        in_progress=Count('id', filter=Q(status='IN_PROGRESS'))
+    )
+    parent = Task.objects.filter(pk=parent_id).first()
+    if parent:
+        propagate_rollup(
+            parent_id,
+            counts['total'] - parent.subtask_count,
+            counts['completed'] - parent.completed_subtask_count,
+            counts['in_progress'] - parent.in_progress_subtask_count,
+            force=True
+        )
+
+def propagate_rollup(parent_id, total=0, completed=0, in_progress=0, force=False):
+    """Apply subtask counter deltas to a parent and carry changes up the chain.
+
+    Each level costs one read and one update, and the walk stops at the
+    first ancestor whose derived completion and status did not change.
+    """
+    now = timezone.now()
+    while parent_id and (force or total or completed or in_progress):
+        force = False
+        parent = Task.objects.filter(pk=parent_id).only(
+            'project_id', 'parent_task_id', 'assigned_to_id', 'is_completed', 'status', 'subtask_count',
+            'completed_subtask_count', 'in_progress_subtask_count'
+        ).first()
+        if parent is None:
+            return
+        was_completed, old_status = parent.is_completed, parent.status
+        parent.subtask_count += total
+        parent.completed_subtask_count += completed
+        parent.in_progress_subtask_count += in_progress
+
+        # A parent without subtasks keeps its own status
+        if parent.subtask_count:
+            parent.is_completed = parent.completed_subtask_count == parent.subtask_count
+            if parent.is_completed:
+                parent.status = 'COMPLETED'
+            elif parent.in_progress_subtask_count:
                 parent.status = 'IN_PROGRESS'
             else:
                 parent.status = 'NOT_STARTED'
-        
-        parent.save()
+
+        Task.objects.filter(pk=parent_id).update(
+            subtask_count=parent.subtask_count,
+            completed_subtask_count=parent.completed_subtask_count,
+            in_progress_subtask_count=parent.in_progress_subtask_count,
+            is_completed=parent.is_completed,
+            status=parent.status,
+            updated_at=now
+        )
+
+        if parent.is_completed != was_completed:
+            adjust_readiness_counters(parent_id, parent.is_completed)
+            # Completed tasks no longer book their assignee
+            bump_bookings_version([parent.assigned_to_id], exclude_project=parent.project_id)
+            if parent.is_completed:
+                parent.update_dependent_tasks()
+
+        # What this parent now contributes to its own parent
+        total = 0
+        completed = int(parent.is_completed) - int(was_completed)
+        in_progress = int(parent.status == 'IN_PROGRESS') - int(old_status == 'IN_PROGRESS')
+        parent_id = parent.parent_task_id
 
 @receiver(post_save, sender=Task)
+@span('signals.update_subtask_privacy')
 def update_subtask_privacy(sender, instance, **kwargs):
-    """Propagate privacy changes to subtasks"""
-    if instance.subtasks.exists():
-        Task.objects.filter(parent_task=instance).update(is_private=instance.is_private)
+    """Propagate privacy changes to the whole subtree in one update"""
+    # A task without a path yet was just inserted and has no subtasks
+    if instance.path:
+        Task.objects.subtree(instance, include_self=False).exclude(
+            is_private=instance.is_private
+        ).update(is_private=instance.is_private, updated_at=timezone.now())
 
 @receiver(post_save, sender=Dependency)
 @receiver(post_save, sender=DependencyGroup)
 @receiver(post_save, sender=ProjectCollaborator)
+@span('signals.update_schedule_on_change')
 def update_schedule_on_change(sender, instance, **kwargs):
-    """Trigger schedule recalculation"""
-    project = None
+    """Queue a schedule recalculation for the affected project"""
+    # Graph edits only move the changed task and its descendants
     if isinstance(instance, Dependency):
-        project = instance.group.task.project
+        task = instance.group.task
+        mark_project_dirty(task.project_id, [task.id])
     elif isinstance(instance, DependencyGroup):
-        project = instance.task.project
+        mark_project_dirty(instance.task.project_id, [instance.task_id])
     elif isinstance(instance, ProjectCollaborator):
-        project = instance.project
-    if project:
-        calculate_project_schedule(project)
\ No newline at end of file
+        mark_project_dirty(instance.project_id)
+
+@receiver(post_save, sender=Task)
+@span('signals.update_schedule_on_task_change')
+def update_schedule_on_task_change(sender, instance, created, **kwargs):
+    """Task edits change the graph version and move the task's descendants"""
+    stored = getattr(instance, '_stored', None)
+    if not created and (stored is None or stored['assigned_to_id'] != instance.assigned_to_id):
+        # A new or freed assignee slot can move tasks outside the closure
+        mark_project_dirty(instance.project_id)
+    else:
+        mark_project_dirty(instance.project_id, [instance.id])
+    # Other projects booking the same users schedule around this task
+    previous = stored['assigned_to_id'] if stored else None
+    bump_bookings_version([instance.assigned_to_id, previous], exclude_project=instance.project_id)
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Dependency)
+@receiver(post_delete, sender=DependencyGroup)
+@receiver(post_delete, sender=ProjectCollaborator)
+@span('signals.update_schedule_on_delete')
+def update_schedule_on_delete(sender, instance, **kwargs):
+    """Queue a full recalculation once part of a project's graph is removed"""
+    if deleting_subtree.get():
+        return
+    # Related rows may already be gone during a cascade, so resolve ids only
+    if isinstance(instance, Dependency):
+        project_id = Task.objects.filter(
+            dependency_groups=instance.group_id
+        ).values_list('project_id', flat=True).first()
+    elif isinstance(instance, DependencyGroup):
+        project_id = Task.objects.filter(
+            pk=instance.task_id
+        ).values_list('project_id', flat=True).first()
+    else:
+        project_id = instance.project_id
+    if project_id:
+        mark_project_dirty(project_id)
+    if isinstance(instance, Task):
+        bump_bookings_version([instance.assigned_to_id], exclude_project=instance.project_id)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=ProjectCollaborator)
+@receiver(post_delete, sender=ProjectCollaborator)
+@span('signals.update_project_access')
+def update_project_access(sender, instance, **kwargs):
+    """Keep the (user, project) access table in step with its sources"""
+    if isinstance(instance, Project):
+        sync_project_access(instance.pk)
+        return
+    previous = getattr(instance, '_stored_project_id', None)
+    for project_id in {instance.project_id, previous} - {None}:
+        sync_project_access(project_id)
+    instance._stored_project_id = instance.project_id
+
+def sync_project_access(project_id):
+    creator_id = Project.objects.filter(pk=project_id).values_list('creator_id', flat=True).first()
+    if creator_id is None:
+        return  # project is being deleted; its grants cascade
+    wanted = {creator_id}
+    wanted.update(
+        ProjectCollaborator.objects.filter(project=project_id).values_list('user_id', flat=True)
+    )
+    current = set(
+        ProjectAccess.objects.filter(project=project_id).values_list('user_id', flat=True)
+    )
+    if current - wanted:
+        ProjectAccess.objects.filter(project=project_id, user__in=current - wanted).delete()
+    ProjectAccess.objects.bulk_create(
+        [ProjectAccess(user_id=user_id, project_id=project_id) for user_id in wanted - current]
+    )
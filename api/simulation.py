@@ -0,0 +1,56 @@
+# api/simulation.py
+from datetime import date
+from .graph import NO_USER, schedule_graph
+from .schedule_cache import get_project_graph
+from .scheduling import build_availability_index
+
+class UnknownTask(ValueError):
+    pass
+
+def apply_edits(graph, edits):
+    """Copy of `graph` with SimulationEditSerializer edits applied"""
+    graph = graph.copy()
+    index = graph.index()
+    for edit in edits:
+        if edit['task'] not in index:
+            raise UnknownTask(f"Task {edit['task']} is not in this project")
+        i = index[edit['task']]
+        if 'duration_days' in edit:
+            graph.durations[i] = edit['duration_days']
+        if 'extra_days' in edit:
+            graph.durations[i] = max(graph.durations[i] + edit['extra_days'], 1)
+        if 'assigned_to' in edit:
+            graph.users[i] = edit['assigned_to'] or NO_USER
+    return graph
+
+def simulate(project, edits):
+    """Reschedule a what-if copy of the project and diff it with the baseline.
+
+    The loaded graph comes from the cache and both passes run in memory,
+    so the only queries are reads (the cached graph on a miss and the
+    assignees' bookings in other projects). Returns the tasks whose dates
+    move, plus the current and simulated project end.
+    """
+    graph = get_project_graph(project)
+    edited = apply_edits(graph, edits)
+    busy = build_availability_index(
+        graph.user_ids() | edited.user_ids(), exclude_project=project
+    )
+    start, end = schedule_graph(graph, project.start_date, busy)
+    new_start, new_end = schedule_graph(edited, project.start_date, busy)
+
+    changed = {}
+    for i, task_id in enumerate(graph.ids):
+        if (start[i], end[i]) != (new_start[i], new_end[i]):
+            changed[str(task_id)] = {
+                'start': date.fromordinal(start[i]).isoformat(),
+                'end': date.fromordinal(end[i]).isoformat(),
+                'simulated_start': date.fromordinal(new_start[i]).isoformat(),
+                'simulated_end': date.fromordinal(new_end[i]).isoformat(),
+                'shift_days': new_end[i] - end[i],
+            }
+    return {
+        'changed': changed,
+        'end': date.fromordinal(max(end)).isoformat() if end else None,
+        'simulated_end': date.fromordinal(max(new_end)).isoformat() if new_end else None,
+    }
@@ -2,11 +2,36 @@
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
-from django.contrib.auth.models import User
-from .models import Project, Task, DependencyGroup, Dependency, ProjectCollaborator
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User, AnonymousUser
+from django.utils import timezone
+from django.utils.http import http_date
+from datetime import date, timedelta
+from .models import (
+    Project, Task, DependencyGroup, Dependency, ProjectCollaborator, ProjectAccess,
+    TaskReachability, tasks_started
+)
+from django.core.exceptions import ValidationError
+from .graph import load_project_graph
+from .scheduling import calculate_project_schedule, reschedule_downstream
+from .schedule_queue import ScheduleQueue
+from . import metrics, renderers
+from .views import TaskViewSet
+import json
+import os
+import re
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
 
 class BaseTestCase(APITestCase):
     def setUp(self):
+        cache.clear()
+
         # Test users
         self.user1 = User.objects.create_user(
             username='user1', password='testpass123'
@@ -39,6 +64,17 @@ class BaseTestCase(APITestCase):
         self.client = APIClient()
         self.client.credentials(HTTP_AUTHORIZATION='Token ' + token)
 
+    def assertConstantQueries(self, url, add_rows, small=1, large=5):
+        """GET `url` runs as many queries after `add_rows(large)` as after
+        `add_rows(small)`, i.e. the endpoint has no per-row queries."""
+        add_rows(small)
+        with CaptureQueriesContext(connection) as before:
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        add_rows(large)
+        with CaptureQueriesContext(connection) as after:
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(len(before.captured_queries), len(after.captured_queries))
+
 class UserRegistrationTests(BaseTestCase):
     def test_user_registration(self):
         url = reverse('register')
@@ -95,6 +131,119 @@ class TaskTests(BaseTestCase):
         subtask = Task.objects.get(id=sub_response.data['id'])
         self.assertTrue(subtask.is_private)
 
+    def test_subtask_rollups_reach_every_ancestor(self):
+        root = Task.objects.create(title='Root', project=self.project, duration_days=1)
+        middle = Task.objects.create(
+            title='Middle', project=self.project, duration_days=1, parent_task=root
+        )
+        leaves = [
+            Task.objects.create(
+                title=f'Leaf {i}', project=self.project, duration_days=1, parent_task=middle
+            ) for i in range(3)
+        ]
+        middle.refresh_from_db()
+        self.assertEqual(middle.subtask_count, 3)
+
+        leaf = Task.objects.get(id=leaves[0].id)
+        leaf.status = 'IN_PROGRESS'
+        leaf.save()
+        root.refresh_from_db()
+        self.assertEqual(root.status, 'IN_PROGRESS')
+        self.assertEqual(root.in_progress_subtask_count, 1)
+
+        for leaf in Task.objects.filter(parent_task=middle):
+            leaf.is_completed = True
+            leaf.save()
+        root.refresh_from_db()
+        middle.refresh_from_db()
+        self.assertEqual((middle.completed_subtask_count, middle.status), (3, 'COMPLETED'))
+        self.assertTrue(root.is_completed)
+        self.assertEqual(root.status, 'COMPLETED')
+
+        # Removing a leaf keeps the counters in step
+        Task.objects.get(id=leaves[1].id).delete()
+        middle.refresh_from_db()
+        self.assertEqual((middle.subtask_count, middle.completed_subtask_count), (2, 2))
+
+        # Reparenting moves the leaf's contribution to the new parent
+        leaf = Task.objects.get(id=leaves[2].id)
+        leaf.parent_task = root
+        leaf.save()
+        root.refresh_from_db()
+        middle.refresh_from_db()
+        self.assertEqual(root.subtask_count, 2)
+        self.assertEqual(middle.subtask_count, 1)
+
+    def test_subtree_paths(self):
+        root = Task.objects.create(title='Root', project=self.project, duration_days=1)
+        middle = Task.objects.create(
+            title='Middle', project=self.project, duration_days=1, parent_task=root
+        )
+        leaf = Task.objects.create(
+            title='Leaf', project=self.project, duration_days=1, parent_task=middle
+        )
+        other = Task.objects.create(title='Other', project=self.project, duration_days=1)
+        self.assertEqual(leaf.path, f'/{root.id}/{middle.id}/{leaf.id}/')
+
+        self.authenticate(self.user1_token)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('task-subtree', args=[root.id]))
+        self.assertEqual([t['id'] for t in response.data], [root.id, middle.id, leaf.id])
+        subtree_queries = len(ctx.captured_queries)
+
+        # Privacy reaches every level in one update
+        root = Task.objects.get(id=root.id)
+        root.is_private = True
+        root.save()
+        self.assertTrue(Task.objects.get(id=leaf.id).is_private)
+
+        # Reparenting rewrites the moved subtree's paths
+        middle = Task.objects.get(id=middle.id)
+        middle.parent_task = other
+        middle.save()
+        self.assertEqual(Task.objects.get(id=leaf.id).path, f'/{other.id}/{middle.id}/{leaf.id}/')
+        with self.assertRaises(ValidationError):
+            other.parent_task = Task.objects.get(id=leaf.id)
+            other.save()
+
+        Task.objects.create(title='Deep', project=self.project, duration_days=1, parent_task=leaf)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('task-subtree', args=[other.id]))
+        self.assertEqual(len(ctx.captured_queries), subtree_queries)
+
+        Task.objects.get(id=other.id).delete()
+        self.assertEqual(list(Task.objects.filter(project=self.project)), [root])
+
+    def test_subtree_delete_is_one_set(self):
+        top = Task.objects.create(title='Top', project=self.project, duration_days=1)
+        upstream = Task.objects.create(title='Upstream', project=self.project, duration_days=1)
+        after = Task.objects.create(title='After', project=self.project, duration_days=1)
+        group = DependencyGroup.objects.create(task=after, logic_type='AND')
+
+        def delete_subtree(width):
+            root = Task.objects.create(
+                title=f'Root {width}', project=self.project, duration_days=1, parent_task=top
+            )
+            children = [
+                Task.objects.create(
+                    title=f'Child {width}.{i}', project=self.project, duration_days=1, parent_task=root
+                ) for i in range(width)
+            ]
+            Dependency.objects.create(
+                group=DependencyGroup.objects.create(task=root, logic_type='AND'), depends_on=upstream
+            )
+            Dependency.objects.create(group=group, depends_on=children[0])
+            root = Task.objects.get(id=root.id)
+            with CaptureQueriesContext(connection) as ctx:
+                root.delete()
+            return len(ctx.captured_queries)
+
+        self.assertEqual(delete_subtree(2), delete_subtree(20))
+        self.assertEqual(Task.objects.get(id=top.id).subtask_count, 0)
+        group.refresh_from_db()
+        self.assertEqual(group.total_count, 0)
+        self.assertFalse(TaskReachability.objects.filter(descendant=after).exists())
+
 class DependencyTests(BaseTestCase):
     def test_and_dependency(self):
         self.authenticate(self.user1_token)
@@ -127,6 +276,139 @@ class DependencyTests(BaseTestCase):
         # Verify task cannot start
         self.assertFalse(Task.objects.get(id=task2.id).can_start())
 
+    def test_cycles_rejected_at_write_time(self):
+        a, b, c, d = [
+            Task.objects.create(title=f'Task {i}', project=self.project, duration_days=1)
+            for i in range(4)
+        ]
+        def depend(task, depends_on, logic_type='AND'):
+            group, _ = DependencyGroup.objects.get_or_create(task=task, logic_type=logic_type)
+            return Dependency.objects.create(group=group, depends_on=depends_on)
+
+        depend(b, a)
+        depend(c, b)
+        link = depend(d, c)
+        depend(d, b, 'OR')
+        self.assertTrue(TaskReachability.reaches(a.id, d.id))
+        self.assertFalse(TaskReachability.reaches(d.id, a.id))
+
+        self.authenticate(self.user1_token)
+        group = DependencyGroup.objects.create(task=a, logic_type='AND')
+        response = self.client.post(reverse('dependency-list'), {
+            'group': group.id, 'depends_on': d.id
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with self.assertRaises(ValidationError):
+            Dependency.objects.create(group=group, depends_on=c)
+
+        # d still reaches back to a through its OR group on b
+        link.delete()
+        self.assertFalse(TaskReachability.reaches(c.id, d.id))
+        self.assertTrue(TaskReachability.reaches(a.id, d.id))
+        b.delete()
+        self.assertFalse(TaskReachability.objects.filter(project=self.project).exists())
+
+    def test_edits_reindex_only_moved_edges(self):
+        a, b, c, d = [
+            Task.objects.create(title=f'Task {i}', project=self.project, duration_days=1)
+            for i in range(4)
+        ]
+        group = DependencyGroup.objects.create(task=b, logic_type='AND')
+        link = Dependency.objects.create(group=group, depends_on=a)
+        Dependency.objects.create(group=DependencyGroup.objects.create(task=c, logic_type='AND'), depends_on=b)
+
+        def pairs():
+            return set(TaskReachability.objects.values_list('ancestor_id', 'descendant_id'))
+
+        # Repoint the edge: a -> b becomes d -> b
+        link = Dependency.objects.get(id=link.id)
+        link.depends_on = d
+        link.save()
+        self.assertEqual(pairs(), {(d.id, b.id), (d.id, c.id), (b.id, c.id)})
+
+        # Move the group from b to a
+        group = DependencyGroup.objects.get(id=group.id)
+        group.task = a
+        group.save()
+        self.assertEqual(pairs(), {(d.id, a.id), (b.id, c.id)})
+
+        # A logic_type change leaves the index alone
+        self.authenticate(self.user1_token)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.patch(
+                reverse('dependencygroup-detail', args=[group.id]), {'logic_type': 'OR'}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('api_taskreachability' in q['sql'] for q in ctx.captured_queries))
+
+    def test_readiness_counters(self):
+        task1 = Task.objects.create(
+            title='Task 1', project=self.project, duration_days=2
+        )
+        task2 = Task.objects.create(
+            title='Task 2', project=self.project, duration_days=1
+        )
+        task3 = Task.objects.create(
+            title='Task 3', project=self.project, duration_days=1
+        )
+        group = DependencyGroup.objects.create(task=task3, logic_type='AND')
+        Dependency.objects.create(group=group, depends_on=task1)
+        Dependency.objects.create(group=group, depends_on=task2)
+        ready = Task.objects.filter(project=self.project).ready()
+        self.assertEqual(set(ready), {task1, task2})
+
+        # The counters are not writable through the API
+        self.authenticate(self.user1_token)
+        response = self.client.post(reverse('dependencygroup-list'), {
+            'task': task1.id, 'logic_type': 'AND', 'satisfied_count': 7, 'total_count': 0
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['satisfied_count'], response.data['total_count']), (0, 0))
+
+        task1 = Task.objects.get(id=task1.id)
+        task1.is_completed = True
+        task1.save()
+        group.refresh_from_db()
+        self.assertEqual((group.satisfied_count, group.total_count), (1, 2))
+        self.assertFalse(Task.objects.get(id=task3.id).can_start())
+
+        Dependency.objects.get(group=group, depends_on=task2).delete()
+        self.assertTrue(Task.objects.get(id=task3.id).can_start())
+        self.assertIn(task3, Task.objects.filter(project=self.project).ready())
+
+    def test_completion_starts_dependents_in_bulk(self):
+        events = []
+        def listener(sender, task_ids, **kwargs):
+            events.append(sorted(task_ids))
+        tasks_started.connect(listener)
+        self.addCleanup(tasks_started.disconnect, listener)
+
+        def complete_hub(width):
+            hub = Task.objects.create(
+                title=f'Hub {width}', project=self.project, duration_days=1
+            )
+            dependents = []
+            for i in range(width):
+                task = Task.objects.create(
+                    title=f'Dependent {width}.{i}', project=self.project, duration_days=1
+                )
+                group = DependencyGroup.objects.create(task=task, logic_type='AND')
+                Dependency.objects.create(group=group, depends_on=hub)
+                dependents.append(task.id)
+            hub = Task.objects.get(id=hub.id)
+            hub.is_completed = True
+            with CaptureQueriesContext(connection) as ctx:
+                hub.save()
+            self.assertEqual(
+                Task.objects.filter(id__in=dependents, status='IN_PROGRESS').count(), width
+            )
+            self.assertEqual(events[-1], sorted(dependents))
+            return len(ctx.captured_queries)
+
+        self.assertEqual(complete_hub(2), complete_hub(6))
+        self.assertEqual(len(events), 2)
+
+@override_settings(SCHEDULE_QUEUE={'ASYNC': False})
 class SchedulingTests(BaseTestCase):
     def test_schedule_generation(self):
         self.authenticate(self.user1_token)
@@ -145,6 +427,559 @@ class SchedulingTests(BaseTestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 2)
 
+    def test_incremental_reschedule(self):
+        task1 = Task.objects.create(
+            title='Task 1', project=self.project, duration_days=2
+        )
+        task2 = Task.objects.create(
+            title='Task 2', project=self.project, duration_days=3
+        )
+        task3 = Task.objects.create(
+            title='Task 3', project=self.project, duration_days=1
+        )
+        calculate_project_schedule(self.project)
+
+        # Adding an edge only moves the dependent task
+        with self.captureOnCommitCallbacks(execute=True):
+            group = DependencyGroup.objects.create(task=task3, logic_type='AND')
+            Dependency.objects.create(group=group, depends_on=task2)
+        task2.refresh_from_db()
+        task3.refresh_from_db()
+        self.assertEqual(task3.start_date, task2.end_date)
+        self.assertEqual(Task.objects.get(id=task1.id).start_date, self.project.start_date)
+
+        # Unchanged upstream dates stop the propagation
+        self.assertEqual(reschedule_downstream(self.project, [task2.id]), {})
+
+    def test_incremental_matches_full_with_shared_assignees(self):
+        first = Task.objects.create(
+            title='First', project=self.project, duration_days=2, assigned_to=self.user2
+        )
+        gap = Task.objects.create(
+            title='Gap', project=self.project, duration_days=4
+        )
+        late = Task.objects.create(
+            title='Late', project=self.project, duration_days=1, assigned_to=self.user2
+        )
+        group = DependencyGroup.objects.create(task=late, logic_type='AND')
+        Dependency.objects.create(group=group, depends_on=gap)
+        calculate_project_schedule(self.project)
+
+        # Shrinking the gap would let a gap-filling pass pull Late backwards
+        Task.objects.filter(pk=gap.pk).update(duration_days=1)
+        reschedule_downstream(self.project, [gap.id])
+        incremental = dict(Task.objects.values_list('id', 'start_date'))
+        calculate_project_schedule(self.project)
+        self.assertEqual(dict(Task.objects.values_list('id', 'start_date')), incremental)
+        self.assertGreater(incremental[late.id], incremental[first.id])
+
+    def test_unassigning_frees_the_slot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            a = Task.objects.create(
+                title='A', project=self.project, duration_days=5, assigned_to=self.user2
+            )
+            b = Task.objects.create(
+                title='B', project=self.project, duration_days=2, assigned_to=self.user2
+            )
+        a.refresh_from_db()
+        b.refresh_from_db()
+        self.assertNotEqual(a.start_date, b.start_date)
+
+        # The incremental pass would only revisit B's downstream
+        b = Task.objects.get(id=b.id)
+        b.assigned_to = None
+        with self.captureOnCommitCallbacks(execute=True):
+            b.save()
+        stored = dict(Task.objects.values_list('id', 'start_date'))
+        self.assertEqual(stored[a.id], self.project.start_date)
+        calculate_project_schedule(self.project)
+        self.assertEqual(dict(Task.objects.values_list('id', 'start_date')), stored)
+
+    def test_schedule_persisted_in_bulk(self):
+        for i in range(5):
+            Task.objects.create(
+                title=f'Task {i}', project=self.project, duration_days=i + 1
+            )
+
+        def count_updates():
+            with CaptureQueriesContext(connection) as ctx:
+                calculate_project_schedule(self.project)
+            return sum(q['sql'].startswith('UPDATE') for q in ctx.captured_queries)
+
+        self.assertEqual(count_updates(), 1)
+        # Unchanged dates are not written again
+        self.assertEqual(count_updates(), 0)
+        self.assertFalse(Task.objects.filter(start_date__isnull=True).exists())
+
+    def test_cross_project_availability(self):
+        other = Project.objects.create(
+            title='Other Project', description='Busy elsewhere', creator=self.user2
+        )
+        start = self.project.start_date
+        Task.objects.create(
+            title='Elsewhere', project=other, duration_days=4,
+            assigned_to=self.user2, start_date=start,
+            end_date=start + timedelta(days=4)
+        )
+        task = Task.objects.create(
+            title='Here', project=self.project, duration_days=1, assigned_to=self.user2
+        )
+        calculate_project_schedule(self.project)
+        task.refresh_from_db()
+        self.assertEqual(task.start_date, start + timedelta(days=5))
+
+    def test_portfolio_schedule_levels_shared_users(self):
+        other = Project.objects.create(
+            title='Other Project', description='Shares user2', creator=self.user2
+        )
+        third = Project.objects.create(
+            title='Third Project', description='Shares user1', creator=self.user2
+        )
+        unrelated = Project.objects.create(
+            title='Unrelated', description='No shared users', creator=self.user2
+        )
+        Task.objects.create(
+            title='Here', project=self.project, duration_days=3, assigned_to=self.user2
+        )
+        Task.objects.create(
+            title='Mine', project=self.project, duration_days=1, assigned_to=self.user1
+        )
+        Task.objects.create(
+            title='There', project=other, duration_days=2, assigned_to=self.user2
+        )
+        Task.objects.create(title='Third', project=third, duration_days=1, assigned_to=self.user1)
+        Task.objects.create(title='Alone', project=unrelated, duration_days=1)
+
+        self.authenticate(self.user1_token)
+        url = reverse('project-portfolio-schedule', args=[self.project.pk])
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['projects'], sorted([self.project.pk, other.pk, third.pk]))
+
+        for user in [self.user1, self.user2]:
+            first, second = Task.objects.filter(assigned_to=user).order_by('start_date')
+            self.assertGreater(second.start_date, first.end_date)
+        self.assertTrue(all(
+            p.schedule_is_fresh for p in Project.objects.filter(pk__in=response.data['projects'])
+        ))
+
+    def test_compact_graph(self):
+        task1 = Task.objects.create(title='Task 1', project=self.project, duration_days=2)
+        task2 = Task.objects.create(title='Task 2', project=self.project, duration_days=3)
+        task3 = Task.objects.create(title='Task 3', project=self.project, duration_days=1)
+        and_group = DependencyGroup.objects.create(task=task3, logic_type='AND')
+        or_group = DependencyGroup.objects.create(task=task3, logic_type='OR')
+        Dependency.objects.create(group=and_group, depends_on=task1)
+        Dependency.objects.create(group=or_group, depends_on=task1)
+        Dependency.objects.create(group=or_group, depends_on=task2)
+
+        graph = load_project_graph(self.project)
+        self.assertEqual(list(graph.ids), [task3.id, task2.id, task1.id])
+        self.assertEqual(list(graph.group_offsets), [0, 2, 2, 2])
+        self.assertEqual(list(graph.group_is_and), [1, 0])
+        self.assertEqual(sorted(graph.deps[1:]), [1, 2])
+
+        schedule = calculate_project_schedule(self.project)
+        start = self.project.start_date
+        self.assertEqual(schedule[task3.id]['start'], start + timedelta(days=2))
+        self.assertEqual(len(schedule), 3)
+
+    def test_cycle_fallback_with_unassigned_tasks(self):
+        task1 = Task.objects.create(title='Task 1', project=self.project, duration_days=2)
+        task2 = Task.objects.create(title='Task 2', project=self.project, duration_days=3)
+        # Saves reject cycles now, so write one the way legacy data has it
+        for task, depends_on in [(task1, task2), (task2, task1)]:
+            group = DependencyGroup.objects.create(task=task, logic_type='AND')
+            Dependency.objects.bulk_create([Dependency(group=group, depends_on=depends_on)])
+
+        schedule = calculate_project_schedule(self.project)
+        self.assertEqual(schedule[task1.id]['start'], self.project.start_date)
+        self.assertIsNone(schedule[task2.id]['user'])
+
+    def test_availability_queries_do_not_scale_with_tasks(self):
+        def schedule_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                calculate_project_schedule(self.project)
+            return len(ctx.captured_queries)
+
+        Task.objects.create(
+            title='Task 0', project=self.project, duration_days=1, assigned_to=self.user1
+        )
+        baseline = schedule_queries()
+        for i in range(1, 6):
+            Task.objects.create(
+                title=f'Task {i}', project=self.project, duration_days=1,
+                assigned_to=self.user2 if i % 2 else self.user1
+            )
+        self.assertEqual(schedule_queries(), baseline)
+
+class BulkImportTests(BaseTestCase):
+    def payload(self):
+        return {'tasks': [
+            {'ref': 'design', 'title': 'Design', 'duration_days': 2},
+            {'ref': 'build', 'title': 'Build', 'duration_days': 5, 'assigned_to': self.user2.id,
+             'dependency_groups': [{'logic_type': 'AND', 'depends_on': ['design']}]},
+            {'ref': 'backend', 'title': 'Backend', 'duration_days': 3, 'parent': 'build'},
+            {'ref': 'frontend', 'title': 'Frontend', 'duration_days': 3, 'parent': 'build'},
+            {'ref': 'release', 'title': 'Release', 'duration_days': 1,
+             'dependency_groups': [{'logic_type': 'OR', 'depends_on': ['backend', 'frontend']}]},
+        ]}
+
+    def test_bulk_import_creates_and_schedules_tree(self):
+        self.authenticate(self.user1_token)
+        url = reverse('project-bulk-import', args=[self.project.id])
+        response = self.client.post(url, self.payload(), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        ids = response.data['tasks']
+
+        build = Task.objects.get(id=ids['build'])
+        design = Task.objects.get(id=ids['design'])
+        self.assertEqual(build.subtask_count, 2)
+        self.assertEqual(build.start_date, design.end_date)
+        self.assertEqual(Task.objects.get(id=ids['backend']).parent_task_id, build.id)
+        group = DependencyGroup.objects.get(task=ids['release'])
+        self.assertEqual((group.logic_type, group.total_count), ('OR', 2))
+        self.assertFalse(Task.objects.filter(project=self.project, start_date__isnull=True).exists())
+        self.project.refresh_from_db()
+        self.assertTrue(self.project.schedule_is_fresh)
+
+    def test_bulk_import_rejects_cycles(self):
+        self.authenticate(self.user1_token)
+        payload = self.payload()
+        payload['tasks'][0]['dependency_groups'] = [{'logic_type': 'AND', 'depends_on': ['build']}]
+        url = reverse('project-bulk-import', args=[self.project.id])
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Task.objects.filter(project=self.project).exists())
+
+    def test_bulk_import_checks_pending_tasks(self):
+        self.authenticate(self.user1_token)
+        url = reverse('project-bulk-import', args=[self.project.id])
+        payload = self.payload()
+        payload['tasks'][0]['assigned_to'] = self.user2.id
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        Task.objects.create(
+            title='Elsewhere', project=self.project, duration_days=1, assigned_to=self.user2,
+            end_date=timezone.now().date()
+        )
+        response = self.client.post(url, self.payload(), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Task.objects.filter(project=self.project).count(), 1)
+
+    def test_bulk_import_requires_project_access(self):
+        self.project.is_public = True
+        self.project.save()
+        self.authenticate(self.user2_token)
+        url = reverse('project-bulk-import', args=[self.project.id])
+        response = self.client.post(url, self.payload(), format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+class TransferTests(BaseTestCase):
+    def test_export_and_import_round_trip(self):
+        self.authenticate(self.user1_token)
+        ProjectCollaborator.objects.create(project=self.project, user=self.user2, role='EDIT')
+        child = Task.objects.create(title='Child', project=self.project, duration_days=1)
+        parent = Task.objects.create(
+            title='Parent', project=self.project, duration_days=2, assigned_to=self.user2
+        )
+        # Parent created after the child, so the dump is not parents-first
+        child.parent_task = parent
+        child.save()
+        group = DependencyGroup.objects.create(task=parent, logic_type='OR')
+        last = Task.objects.create(title='Last', project=self.project, duration_days=1)
+        Dependency.objects.create(group=group, depends_on=last)
+        started = date(2024, 3, 1)
+        Project.objects.filter(id=self.project.id).update(start_date=started)
+
+        response = self.client.get(reverse('project-export', args=[self.project.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual([json.loads(line)['type'] for line in lines], [
+            'project', 'collaborator', 'task', 'task', 'task', 'dependency_group', 'dependency'
+        ])
+
+        with tempfile.NamedTemporaryFile(suffix='.ndjson') as dump:
+            dump.write(b'\n'.join(lines))
+            dump.flush()
+            call_command('import_project', dump.name, creator='user2', chunk_size=2, stdout=StringIO())
+
+        copy = Project.objects.exclude(id=self.project.id).get()
+        self.assertEqual(copy.creator, self.user2)
+        self.assertEqual(copy.start_date, started)
+        new_parent = Task.objects.get(project=copy, title='Parent')
+        self.assertEqual(new_parent.assigned_to, self.user2)
+        self.assertEqual(new_parent.subtask_count, 1)
+        self.assertEqual(Task.objects.get(project=copy, title='Child').parent_task, new_parent)
+        new_group = DependencyGroup.objects.get(task=new_parent)
+        self.assertEqual(new_group.dependencies.get().depends_on.title, 'Last')
+        self.assertTrue(ProjectAccess.objects.filter(project=copy, user=self.user2).exists())
+
+class ScheduleCacheTests(BaseTestCase):
+    def test_schedule_served_from_cache_until_graph_changes(self):
+        self.authenticate(self.user1_token)
+        task = Task.objects.create(
+            title='Task 1', project=self.project, duration_days=2
+        )
+        url = reverse('project-schedule', args=[self.project.id])
+        first = self.client.get(url)
+        self.assertEqual(first.data[str(task.id)]['title'], 'Task 1')
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(url)
+        self.assertEqual(second.data, first.data)
+        self.assertFalse(any('"api_task"' in q['sql'] for q in ctx.captured_queries))
+
+        # Any task write bumps the version and invalidates the entry
+        task.title = 'Renamed'
+        task.save()
+        third = self.client.get(url)
+        self.assertEqual(third.data[str(task.id)]['title'], 'Renamed')
+        self.assertNotEqual(third['X-Schedule-Version'], first['X-Schedule-Version'])
+
+    def test_bookings_in_other_projects_invalidate_schedule(self):
+        self.authenticate(self.user1_token)
+        task = Task.objects.create(
+            title='Here', project=self.project, duration_days=1, assigned_to=self.user2
+        )
+        url = reverse('project-schedule', args=[self.project.id])
+        first = self.client.get(url)
+        start = self.project.start_date
+        self.assertEqual(first.data[str(task.id)]['start'], start.isoformat())
+
+        other = Project.objects.create(
+            title='Other Project', description='Busy elsewhere', creator=self.user2
+        )
+        Task.objects.create(
+            title='Elsewhere', project=other, duration_days=4, assigned_to=self.user2,
+            start_date=start, end_date=start + timedelta(days=4)
+        )
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code,
+            status.HTTP_200_OK
+        )
+        second = self.client.get(url)
+        self.assertEqual(second.data[str(task.id)]['start'], (start + timedelta(days=5)).isoformat())
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+class SimulationTests(BaseTestCase):
+    def test_simulation_writes_nothing(self):
+        self.authenticate(self.user1_token)
+        task1 = Task.objects.create(title='Task 1', project=self.project, duration_days=2)
+        task2 = Task.objects.create(title='Task 2', project=self.project, duration_days=3)
+        group = DependencyGroup.objects.create(task=task2, logic_type='AND')
+        Dependency.objects.create(group=group, depends_on=task1)
+        Task.objects.create(title='Elsewhere', project=self.project, duration_days=1)
+        url = reverse('project-simulate', args=[self.project.id])
+        stored = list(Task.objects.values_list('id', 'start_date', 'end_date', 'duration_days'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(url, {'edits': [
+                {'task': task1.id, 'extra_days': 10},
+                {'task': task2.id, 'assigned_to': self.user2.id},
+            ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['changed']), {str(task1.id), str(task2.id)})
+        self.assertEqual(response.data['changed'][str(task2.id)]['shift_days'], 10)
+        self.assertFalse(any(
+            q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE')) for q in ctx.captured_queries
+        ))
+        self.assertEqual(
+            list(Task.objects.values_list('id', 'start_date', 'end_date', 'duration_days')), stored
+        )
+
+        # The loaded graph is reused until the project changes
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(url, {'edits': [{'task': task1.id, 'duration_days': 1}]}, format='json')
+        self.assertFalse(any('"api_dependency"' in q['sql'] for q in ctx.captured_queries))
+
+        response = self.client.post(url, {'edits': [{'task': 0, 'extra_days': 1}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class CriticalPathTests(BaseTestCase):
+    def test_critical_path(self):
+        self.authenticate(self.user1_token)
+        a = Task.objects.create(title='A', project=self.project, duration_days=2)
+        b = Task.objects.create(title='B', project=self.project, duration_days=3)
+        c = Task.objects.create(title='C', project=self.project, duration_days=1)
+        d = Task.objects.create(title='D', project=self.project, duration_days=1)
+        for task, logic_type in [(c, 'AND'), (d, 'OR')]:
+            group = DependencyGroup.objects.create(task=task, logic_type=logic_type)
+            for depends_on in [a, b]:
+                Dependency.objects.create(group=group, depends_on=depends_on)
+
+        url = reverse('project-critical-path', args=[self.project.id])
+        response = self.client.get(url)
+        self.assertEqual(response.data['critical_path'], [b.id, c.id])
+        tasks = response.data['tasks']
+        self.assertEqual(
+            [tasks[str(t.id)]['total_float'] for t in [a, b, c, d]], [1, 0, 0, 1]
+        )
+        start = self.project.start_date
+        self.assertEqual(tasks[str(d.id)]['earliest_start'], (start + timedelta(days=2)).isoformat())
+        self.assertEqual(response.data['project_end'], (start + timedelta(days=4)).isoformat())
+
+        with CaptureQueriesContext(connection) as ctx:
+            again = self.client.get(url)
+        self.assertEqual(again.data, response.data)
+        self.assertFalse(any('"api_task"' in q['sql'] for q in ctx.captured_queries))
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_vectorized_critical_path_matches(self):
+        from . import critical_path
+        if critical_path.np is None:
+            self.skipTest("numpy is not installed")
+        from benchmarks.generator import generate_project
+        project = generate_project(self.user1, tasks=300, shape='random', seed=5)
+        graph = load_project_graph(project)
+        for loop, vectorized in zip(
+            critical_path._analyze(graph), critical_path._analyze_vectorized(graph)
+        ):
+            self.assertEqual(list(loop), [int(v) for v in vectorized])
+
+class SerializerQueryTests(BaseTestCase):
+    def test_task_list_has_no_per_row_queries(self):
+        self.authenticate(self.user1_token)
+
+        def add_tasks(count):
+            for i in range(count):
+                Task.objects.create(
+                    title=f'Task {i}', project=self.project, duration_days=1,
+                    assigned_to=self.user2 if i % 2 else self.user1
+                )
+        self.assertConstantQueries(reverse('task-list'), add_tasks)
+
+    def test_project_list_has_no_per_row_queries(self):
+        self.authenticate(self.user1_token)
+
+        def add_projects(count):
+            for i in range(count):
+                project = Project.objects.create(
+                    title=f'Project {i}', description='', creator=self.user1
+                )
+                Task.objects.create(title='Task', project=project, duration_days=1)
+                ProjectCollaborator.objects.create(project=project, user=self.user2)
+        self.assertConstantQueries(reverse('project-list'), add_projects)
+
+    def test_is_public_is_inverse_of_is_private(self):
+        self.authenticate(self.user1_token)
+        task = Task.objects.create(
+            title='Task', project=self.project, duration_days=1, is_private=True
+        )
+        response = self.client.get(reverse('task-detail', args=[task.id]))
+        self.assertFalse(response.data['is_public'])
+
+class RenderingTests(BaseTestCase):
+    def test_fast_renderer_matches_stdlib(self):
+        data = {'title': 'Caf\u00e9 \u2028', 'ids': [1, 2], 'nested': {'ok': True, 'none': None}}
+        fast = renderers.FastJSONRenderer().render(data)
+        with mock.patch.object(renderers, 'orjson', None):
+            plain = renderers.FastJSONRenderer().render(data)
+        self.assertEqual(json.loads(fast), data)
+        self.assertEqual(fast, plain)
+
+    def test_streamed_task_list_and_schedule(self):
+        self.authenticate(self.user1_token)
+        for i in range(3):
+            Task.objects.create(title=f'Task {i}', project=self.project, duration_days=1)
+
+        response = self.client.get(reverse('task-list') + '?stream=1')
+        self.assertTrue(response.streaming)
+        tasks = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(tasks), 3)
+
+        url = reverse('project-schedule', args=[self.project.id])
+        streamed = json.loads(b''.join(self.client.get(url + '?stream=1').streaming_content))
+        self.assertEqual(streamed, self.client.get(url).json())
+
+class PaginationTests(BaseTestCase):
+    def test_cursor_pages_cover_every_task_once(self):
+        self.authenticate(self.user1_token)
+        created = {
+            Task.objects.create(
+                title=f'Task {i}', project=self.project, duration_days=1
+            ).id for i in range(5)
+        }
+        seen = []
+        url = reverse('task-list') + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(task['id'] for task in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, sorted(created, reverse=True))
+
+class ConditionalGetTests(BaseTestCase):
+    def test_task_list_etag(self):
+        self.authenticate(self.user1_token)
+        task = Task.objects.create(
+            title='Task 1', project=self.project, duration_days=2
+        )
+        url = reverse('task-list')
+        response = self.client.get(url)
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as ctx:
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        # Only auth and the aggregate ran, not the list query
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+        task.title = 'Renamed'
+        task.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # A delete never moves the latest updated_at forward
+        self.assertNotIn('Last-Modified', response)
+        since = http_date(task.updated_at.timestamp() + 60)
+        task.delete()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+
+    def test_schedule_etag(self):
+        self.authenticate(self.user1_token)
+        Task.objects.create(
+            title='Task 1', project=self.project, duration_days=2
+        )
+        url = reverse('project-schedule', args=[self.project.id])
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+class ScheduleQueueTests(BaseTestCase):
+    def test_marks_are_coalesced_per_project(self):
+        task1 = Task.objects.create(
+            title='Task 1', project=self.project, duration_days=2
+        )
+        task2 = Task.objects.create(
+            title='Task 2', project=self.project, duration_days=3
+        )
+        group = DependencyGroup.objects.create(task=task2, logic_type='AND')
+        Dependency.objects.create(group=group, depends_on=task1)
+        self.project.refresh_from_db()
+        self.assertFalse(self.project.schedule_is_fresh)
+
+        queue = ScheduleQueue()
+        queue._ensure_worker = lambda: None  # drive the queue by hand
+        for _ in range(3):
+            queue.mark_dirty(self.project.id, [task2.id])
+        queue.mark_dirty(self.project.id)
+        self.assertEqual(len(queue._pending), 1)
+        self.assertIsNone(queue._pending[self.project.id][1])
+
+        queue.flush()
+        self.assertFalse(queue.is_pending(self.project.id))
+        self.project.refresh_from_db()
+        self.assertTrue(self.project.schedule_is_fresh)
+        task2.refresh_from_db()
+        self.assertEqual(task2.start_date, Task.objects.get(id=task1.id).end_date)
+
 class SecurityTests(BaseTestCase):
     def test_unauthorized_access(self):
         def test_unauthorized_access(self):
@@ -156,4 +991,184 @@ class SecurityTests(BaseTestCase):
         self.authenticate(self.user2_token)
         url = reverse('project-detail', args=[self.project.id])
         response = self.client.get(url)
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class ProjectAccessTests(BaseTestCase):
+    def test_access_follows_collaborators(self):
+        self.assertTrue(ProjectAccess.objects.filter(user=self.user1, project=self.project).exists())
+        self.authenticate(self.user2_token)
+        url = reverse('project-detail', args=[self.project.id])
+
+        collaborator = ProjectCollaborator.objects.create(project=self.project, user=self.user2)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        # Moving the collaborator revokes access to the project it left
+        other = Project.objects.create(title='Other', description='', creator=self.user1)
+        collaborator = ProjectCollaborator.objects.get(pk=collaborator.pk)
+        collaborator.project = other
+        collaborator.save()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(ProjectAccess.objects.filter(user=self.user2, project=other).exists())
+
+        collaborator.delete()
+        self.assertFalse(ProjectAccess.objects.filter(user=self.user2, project=other).exists())
+
+    def test_visibility_queries_use_access_index(self):
+        self.authenticate(self.user1_token)
+        for name in ['project-list', 'task-list']:
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(reverse(name))
+            # The list query itself, not the serializer's follow-ups
+            sql = next(
+                q['sql'] for q in ctx.captured_queries
+                if 'api_projectaccess' in q['sql'] and 'COUNT' not in q['sql']
+            )
+            self.assertNotIn('DISTINCT', sql)
+
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plan = [row[-1] for row in cursor.fetchall()]
+            access = [line for line in plan if 'api_projectaccess' in line]
+            self.assertTrue(access, plan)
+            self.assertTrue(all(line.startswith('SEARCH') and 'INDEX' in line for line in access), plan)
+
+class QueryPlanTests(BaseTestCase):
+    """EXPLAIN the hot Task/Project queries and fail on full table scans"""
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        full_scans = [
+            line for line in plan.splitlines()
+            if re.search(r'SCAN (api_task|api_project)\b', line) and 'USING' not in line
+        ]
+        self.assertFalse(full_scans, plan)
+        self.assertIn(index, plan)
+
+    def test_pending_tasks_of_assignee(self):
+        queryset = self.user2.assigned_tasks.filter(
+            is_completed=False, end_date__gte=timezone.now().date()
+        )
+        self.assertUsesIndex(queryset, 'task_assignee_open_idx')
+
+    def test_availability_index(self):
+        queryset = Task.objects.filter(
+            assigned_to__in=[self.user1.id, self.user2.id], is_completed=False,
+            start_date__isnull=False, end_date__isnull=False
+        ).exclude(project=self.project)
+        self.assertUsesIndex(queryset, 'task_assignee_open_idx')
+
+    def test_subtask_rollup_filters(self):
+        self.assertUsesIndex(
+            Task.objects.filter(parent_task=1, is_completed=False), 'task_parent_open_idx'
+        )
+        self.assertUsesIndex(
+            Task.objects.filter(parent_task=1, status='IN_PROGRESS'), 'task_parent_status_idx'
+        )
+
+    def test_subtree(self):
+        root = Task.objects.create(title='Root', project=self.project, duration_days=1)
+        self.assertUsesIndex(Task.objects.subtree(root), 'task_path_idx')
+
+    def test_anonymous_listings(self):
+        view = TaskViewSet(request=mock.Mock(user=AnonymousUser()), action='list', format_kwarg=None)
+        self.assertUsesIndex(view.get_queryset(), 'task_project_public_idx')
+        self.assertUsesIndex(Project.objects.filter(is_public=True), 'project_public_idx')
+
+class BenchmarkTests(BaseTestCase):
+    """The synthetic generator and the suite runner"""
+
+    def test_generator_is_seeded_and_shaped(self):
+        from benchmarks.generator import generate_project
+        project = generate_project(self.user1, tasks=60, shape='layered', width=10,
+                                   subtask_depth=2, subtask_ratio=0.5, seed=3)
+        tasks = Task.objects.filter(project=project)
+        self.assertEqual(tasks.count(), 60)
+        self.assertTrue(tasks.filter(parent_task__isnull=False).exists())
+        self.assertFalse(tasks.filter(parent_task__parent_task__parent_task__isnull=False).exists())
+        self.assertTrue(DependencyGroup.objects.filter(task__project=project, logic_type='OR').exists())
+        self.assertFalse(tasks.filter(start_date__isnull=True).exists())
+
+        again = generate_project(self.user1, tasks=60, shape='layered', width=10,
+                                 subtask_depth=2, subtask_ratio=0.5, seed=3)
+        shape = lambda p: list(Dependency.objects.filter(group__task__project=p).values_list(
+            'group__task__title', 'depends_on__title', 'group__logic_type').order_by('id'))
+        self.assertEqual(shape(project), shape(again))
+
+    def test_suite_reports_and_compares(self):
+        from benchmarks.suite import run_suite, compare
+        report = run_suite({'tasks': 30, 'shape': 'random'}, repeat=1,
+                           only=['schedule_full', 'schedule_endpoint_warm'])
+        self.assertEqual(set(report['results']), {'schedule_full', 'schedule_endpoint_warm'})
+        self.assertGreater(report['results']['schedule_full']['queries'], 0)
+        json.dumps(report)
+        slower = {'results': {'schedule_full': {'median_ms': report['results']['schedule_full']['median_ms'] / 2}}}
+        [(name, _, _, ratio, regressed)] = compare(report, slower)
+        self.assertEqual(name, 'schedule_full')
+        self.assertTrue(regressed)
+
+class MetricsTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for metric in metrics.REGISTRY:
+            metric.clear()
+
+    def test_request_headers_and_histograms(self):
+        self.authenticate(self.user1_token)
+        response = self.client.get(reverse('project-list'))
+        self.assertGreater(int(response['X-DB-Queries']), 0)
+        self.assertIn('X-DB-Time-Ms', response)
+        self.assertIn('X-View-Time-Ms', response)
+
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn(
+            'http_request_duration_seconds_count{method="GET",route="project-list",status="200"} 1',
+            body
+        )
+        self.assertIn('http_request_db_queries_bucket{method="GET",route="project-list",le="+Inf"} 1', body)
+
+    def test_spans(self):
+        calculate_project_schedule(self.project)
+        Task.objects.create(project=self.project, title='Spanned', duration_days=1)
+        body = metrics.render_metrics()
+        self.assertIn('span_duration_seconds_count{span="scheduling.calculate_project_schedule"}', body)
+        self.assertIn('span_duration_seconds_count{span="signals.handle_task_updates"}', body)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+class ProfilingTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        override = override_settings(PROFILING={'DIRECTORY': directory.name, 'MAX_FILES': 2})
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_staff_profile_is_stored_and_linked(self):
+        User.objects.filter(pk=self.user1.pk).update(is_staff=True)
+        self.authenticate(self.user1_token)
+        url = reverse('project-schedule', args=[self.project.id])
+        for _ in range(3):
+            response = self.client.get(url + '?profile=1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+        summary = self.client.get(response['X-Profile-URL'] + '?summary=1')
+        self.assertEqual(summary.status_code, status.HTTP_200_OK)
+        self.assertIn(b'function calls', summary.content)
+
+    def test_ignored_for_other_users(self):
+        self.authenticate(self.user1_token)
+        with mock.patch('api.middleware.cProfile.Profile') as profile:
+            response = self.client.get(reverse('project-list'), HTTP_X_PROFILE='1')
+            APIClient().get(reverse('project-list') + '?profile=1')
+        profile.assert_not_called()
+        self.assertNotIn('X-Profile-URL', response)
+        self.assertEqual(os.listdir(self.directory), [])
+        response = self.client.get(reverse('profile-detail', args=['x.prof']))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,165 @@
+# api/transfer.py
+"""Streaming NDJSON export and chunked import of whole projects.
+
+Each line is one JSON object with a "type" of project, collaborator,
+task, dependency_group or dependency, in that order. Rows keep their
+source ids so references can be remapped on import. Users are referenced
+by username, so dumps move between environments.
+"""
+import json
+from datetime import date
+from django.contrib.auth.models import User
+from django.db import transaction
+from .models import Project, Task, DependencyGroup, Dependency, ProjectCollaborator
+from .reachability import rebuild_project
+from .renderers import STREAM_CHUNK_SIZE, dumps
+from .schedule_queue import bump_graph_version
+from .scheduling import bump_bookings_version
+from .signals import sync_project_access
+
+TASK_FIELDS = [
+    'id', 'parent_task', 'title', 'description', 'duration_days', 'is_private',
+    'is_completed', 'status', 'start_date', 'end_date', 'subtask_count',
+    'completed_subtask_count', 'in_progress_subtask_count'
+]
+
+def _rows(queryset, fields):
+    return queryset.order_by('id').values(*fields).iterator(chunk_size=STREAM_CHUNK_SIZE)
+
+def export_project(project):
+    """Yield the project as NDJSON lines (bytes), reading rows in chunks"""
+    yield dumps({
+        'type': 'project', 'id': project.pk, 'title': project.title,
+        'description': project.description, 'is_public': project.is_public,
+        'start_date': project.start_date
+    }) + b'\n'
+
+    collaborators = ProjectCollaborator.objects.filter(project=project)
+    for row in _rows(collaborators, ['user__username', 'role']):
+        yield dumps({'type': 'collaborator', 'user': row['user__username'], 'role': row['role']}) + b'\n'
+
+    tasks = Task.objects.filter(project=project)
+    for row in _rows(tasks, TASK_FIELDS + ['assigned_to__username']):
+        row['assigned_to'] = row.pop('assigned_to__username')
+        yield dumps({'type': 'task', **row}) + b'\n'
+
+    groups = DependencyGroup.objects.filter(task__project=project)
+    for row in _rows(groups, ['id', 'task', 'logic_type', 'total_count', 'satisfied_count']):
+        yield dumps({'type': 'dependency_group', **row}) + b'\n'
+
+    dependencies = Dependency.objects.filter(group__task__project=project)
+    for row in _rows(dependencies, ['group', 'depends_on']):
+        yield dumps({'type': 'dependency', **row}) + b'\n'
+
+class ProjectImporter:
+    """Loads an NDJSON project dump in chunks, remapping every id.
+
+    Only the old -> new id maps stay in memory. Parent links are written
+    after all tasks exist, since a dump need not list parents first.
+    Unknown usernames leave tasks unassigned and skip collaborators.
+    """
+
+    def __init__(self, creator, chunk_size=STREAM_CHUNK_SIZE):
+        self.creator = creator
+        self.chunk_size = chunk_size
+        self.project = None
+        self.task_ids = {}
+        self.group_ids = {}
+        self.parents = []  # (old task id, old parent id)
+        self.users = {}
+        self.skipped_users = set()
+        self._pending = []
+        self._pending_type = None
+
+    @transaction.atomic
+    def load(self, lines):
+        for line in lines:
+            if line.strip():
+                self._add(json.loads(line))
+        self._flush()
+        if self.project is None:
+            raise ValueError("Dump contains no project line")
+
+        links = [
+            Task(pk=self.task_ids[old], parent_task_id=self.task_ids[parent])
+            for old, parent in self.parents
+        ]
+        Task.objects.bulk_update(links, ['parent_task'], batch_size=self.chunk_size)
+        Task.rebuild_paths(self.project.pk)
+        sync_project_access(self.project.pk)
+        rebuild_project(self.project.pk)
+        # Dates came from another environment; reschedule on next read
+        bump_graph_version(self.project.pk)
+        # Imported tasks may book users that other projects schedule around
+        bump_bookings_version(self.users.values(), exclude_project=self.project.pk)
+        return self.project
+
+    def _add(self, row):
+        kind = row.pop('type')
+        if kind == 'project':
+            self.project = Project.objects.create(
+                creator=self.creator, title=row['title'],
+                description=row['description'], is_public=row['is_public']
+            )
+            if row.get('start_date'):
+                # auto_now_add ignores the value on create, so restore it after
+                self.project.start_date = date.fromisoformat(row['start_date'])
+                Project.objects.filter(pk=self.project.pk).update(start_date=self.project.start_date)
+            return
+        if self.project is None:
+            raise ValueError("The project line must come first")
+        if kind != self._pending_type or len(self._pending) >= self.chunk_size:
+            self._flush()
+            self._pending_type = kind
+        self._pending.append(row)
+
+    def _flush(self):
+        rows, self._pending = self._pending, []
+        if rows:
+            create = {
+                'collaborator': self._create_collaborators,
+                'task': self._create_tasks,
+                'dependency_group': self._create_groups,
+                'dependency': self._create_dependencies,
+            }[self._pending_type]
+            create(rows)
+
+    def _user_id(self, username):
+        if username is None:
+            return None
+        if username not in self.users:
+            self.users[username] = User.objects.filter(username=username).values_list('pk', flat=True).first()
+            if self.users[username] is None:
+                self.skipped_users.add(username)
+        return self.users[username]
+
+    def _create_collaborators(self, rows):
+        ProjectCollaborator.objects.bulk_create([
+            ProjectCollaborator(project=self.project, user_id=self._user_id(row['user']), role=row['role'])
+            for row in rows if self._user_id(row['user'])
+        ])
+
+    def _create_tasks(self, rows):
+        tasks = []
+        for row in rows:
+            if row['parent_task'] is not None:
+                self.parents.append((row['id'], row['parent_task']))
+            fields = {f: row[f] for f in TASK_FIELDS if f not in ['id', 'parent_task']}
+            tasks.append(Task(project=self.project, assigned_to_id=self._user_id(row['assigned_to']), **fields))
+        created = Task.objects.bulk_create(tasks)
+        self.task_ids.update(zip((row['id'] for row in rows), (task.pk for task in created)))
+
+    def _create_groups(self, rows):
+        created = DependencyGroup.objects.bulk_create([
+            DependencyGroup(
+                task_id=self.task_ids[row['task']], logic_type=row['logic_type'],
+                total_count=row['total_count'], satisfied_count=row['satisfied_count']
+            ) for row in rows
+        ])
+        self.group_ids.update(zip((row['id'] for row in rows), (group.pk for group in created)))
+
+    def _create_dependencies(self, rows):
+        Dependency.objects.bulk_create([
+            Dependency(group_id=self.group_ids[row['group']], depends_on_id=self.task_ids[row['depends_on']])
+            for row in rows
+        ])
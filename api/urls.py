@@ -10,6 +10,7 @@ from .views import (
     RegisterView,
     UserTaskViewSet
 )
+from .profiling import ProfileView
 
 router = DefaultRouter()
 router.register(r'projects', ProjectViewSet, basename='project')
@@ -22,5 +23,6 @@ router.register(r'users/(?P<user_id>\d+)/tasks', UserTaskViewSet, basename='user
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
+    path('profiles/<str:name>/', ProfileView.as_view(), name='profile-detail'),
     path('', include(router.urls)),
 ]
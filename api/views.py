@@ -3,77 +3,238 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth.models import User
 from django.db import models
-from .models import Project, Task, Dependency, ProjectCollaborator, DependencyGroup
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from .models import (
+    Project, Task, Dependency, ProjectCollaborator, DependencyGroup, ProjectAccess
+)
 from .serializers import (
     ProjectSerializer, TaskSerializer, 
     DependencySerializer, ProjectCollaboratorSerializer,
-    DependencyGroupSerializer, UserSerializer
+    DependencyGroupSerializer, UserSerializer, BulkImportSerializer, SimulationSerializer
+)
+from .bulk import import_task_tree
+from .transfer import export_project
+from .scheduling import schedule_portfolio
+from . import simulation
+from .schedule_queue import recalculate_project
+from .schedule_cache import get_critical_path, get_project_schedule, stream_project_schedule
+from .renderers import (
+    STREAM_CHUNK_SIZE, wants_stream, stream_json_array, stream_json_object,
+    streaming_json_response
 )
-from .scheduling import calculate_project_schedule
+
+class ConditionalGetMixin:
+    """Answer If-None-Match / If-Modified-Since with 304 before serializing.
+
+    List ETags come from one aggregate over the filtered queryset (latest
+    updated_at and row count); detail validators from the object. Lists
+    send no Last-Modified: a delete or a lost grant shrinks the list
+    without moving its latest updated_at forward.
+    """
+
+    def list(self, request, *args, **kwargs):
+        stats = self.filter_queryset(self.get_queryset()).order_by().aggregate(
+            last_modified=models.Max('updated_at'), count=models.Count('pk')
+        )
+        last_modified = stats['last_modified']
+        stamp = last_modified.timestamp() if last_modified else 0
+        etag = quote_etag(f"{stats['count']}-{stamp}")
+
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+        return with_validators(super().list(request, *args, **kwargs), etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = quote_etag(f"{instance.pk}-{instance.updated_at.timestamp()}")
+
+        not_modified = conditional_response(request, etag, instance.updated_at)
+        if not_modified is not None:
+            return not_modified
+        response = Response(self.get_serializer(instance).data)
+        return with_validators(response, etag, instance.updated_at)
+
+def conditional_response(request, etag, last_modified=None):
+    """304 (or 412) response when the client's validators still match"""
+    stamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=stamp)
+    if response is not None:
+        response['ETag'] = etag
+    return response
+
+def with_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(int(last_modified.timestamp()))
+    return response
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = [permissions.AllowAny]
     serializer_class = UserSerializer
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
         user = self.request.user
         if user.is_authenticated:
-            return Project.objects.filter(
+            queryset = Project.objects.filter(
                 models.Q(is_public=True) |
-                models.Q(creator=user) |
-                models.Q(collaborators__user=user)
-            ).distinct()
-        return Project.objects.filter(is_public=True)
+                models.Exists(ProjectAccess.objects.filter(user=user, project=models.OuterRef('pk')))
+            )
+        else:
+            queryset = Project.objects.filter(is_public=True)
+        # Actions like schedule only need the project row itself
+        if self.action in ['list', 'retrieve']:
+            queryset = self.get_serializer_class().setup_eager_loading(queryset)
+        return queryset
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in [
+            'create', 'update', 'partial_update', 'destroy',
+            'bulk_import', 'export', 'portfolio_schedule', 'simulate'
+        ]:
             return [permissions.IsAuthenticated()]
         return super().get_permissions()
 
     @action(detail=True, methods=['get'])
     def schedule(self, request, pk=None):
         project = self.get_object()
-        schedule = calculate_project_schedule(project)
-        
-        # Get all tasks in one query
-        tasks = {t.id: t for t in Task.objects.filter(id__in=schedule.keys())}
-        
-        return Response({
-            str(task_id): {
-                'title': tasks[task_id].title,
-                'start': dates['start'].isoformat(),
-                'end': dates['end'].isoformat(),
-                'assigned_to': tasks[task_id].assigned_to.username if tasks[task_id].assigned_to else None
-            } for task_id, dates in schedule.items()
-        })
-
-class TaskViewSet(viewsets.ModelViewSet):
+        # Bookings in other projects move the schedule without a graph version bump
+        etag = quote_etag(
+            f"schedule-{project.pk}-{project.graph_version}-{project.bookings_version}"
+        )
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            response = not_modified
+        elif wants_stream(request):
+            chunks = stream_json_object(stream_project_schedule(project))
+            response = with_validators(streaming_json_response(chunks), etag)
+        else:
+            response = with_validators(Response(get_project_schedule(project)), etag)
+        response['X-Schedule-Version'] = project.graph_version
+        return response
+
+    @action(detail=True, methods=['get'], url_path='critical-path')
+    def critical_path(self, request, pk=None):
+        """Earliest/latest dates, total float and the critical path (see api/critical_path.py)"""
+        project = self.get_object()
+        etag = quote_etag(f"critical-path-{project.pk}-{project.graph_version}")
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+        return with_validators(Response(get_critical_path(project)), etag)
+
+    @action(detail=True, methods=['post'])
+    def simulate(self, request, pk=None):
+        """Schedule hypothetical task edits in memory and return the date diff"""
+        project = self.get_object()
+        serializer = SimulationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            result = simulation.simulate(project, serializer.validated_data['edits'])
+        except simulation.UnknownTask as e:
+            return Response({'edits': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+    @action(detail=True, methods=['post'], url_path='portfolio-schedule')
+    def portfolio_schedule(self, request, pk=None):
+        """Level this project together with every project sharing its assignees"""
+        project = self.get_object()
+        if not ProjectAccess.objects.filter(user=request.user, project=project).exists():
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        user_ids = Task.objects.filter(project=project, assigned_to__isnull=False).values_list(
+            'assigned_to_id', flat=True
+        ).distinct()
+        project_ids = schedule_portfolio(user_ids)
+        if not project_ids:
+            # Without assignees the project is a portfolio of its own
+            recalculate_project(project)
+            project_ids = {project.pk}
+        return Response({'projects': sorted(project_ids)})
+
+    @action(detail=True, methods=['post'], url_path='bulk-import')
+    def bulk_import(self, request, pk=None):
+        """Create a task tree with dependency groups in one transaction"""
+        project = self.get_object()
+        if not ProjectAccess.objects.filter(user=request.user, project=project).exists():
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        serializer = BulkImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = import_task_tree(
+            project, serializer.validated_data['tasks'], serializer.validated_data['levels']
+        )
+        return Response({'created': len(ids), 'tasks': ids}, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """Stream the whole project as NDJSON (see api/transfer.py)"""
+        project = self.get_object()
+        if not ProjectAccess.objects.filter(user=request.user, project=project).exists():
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+        response = StreamingHttpResponse(export_project(project), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="project-{project.pk}.ndjson"'
+        return response
+
+class TaskViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
         user = self.request.user
         if user.is_authenticated:
-            return Task.objects.filter(
+            queryset = Task.objects.filter(
                 models.Q(is_private=False) |
-                models.Q(project__creator=user) |
                 models.Q(assigned_to=user) |
-                models.Q(project__collaborators__user=user)
-            ).distinct()
-        return Task.objects.filter(project__is_public=True, is_private=False)
+                models.Exists(ProjectAccess.objects.filter(user=user, project=models.OuterRef('project')))
+            )
+        else:
+            # IN over public project ids lets both partial indexes be used
+            queryset = Task.objects.filter(
+                is_private=False,
+                project__in=Project.objects.filter(is_public=True).values('pk')
+            )
+        return self.get_serializer_class().setup_eager_loading(queryset)
+
+    def list(self, request, *args, **kwargs):
+        if not wants_stream(request):
+            return super().list(request, *args, **kwargs)
+        # Unpaginated, encoded row by row from a chunked cursor
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)
+        return streaming_json_response(
+            stream_json_array(self.get_serializer(task).data for task in rows)
+        )
+
+    @action(detail=True, methods=['get'])
+    def subtree(self, request, pk=None):
+        """The task and every visible subtask below it, parents first"""
+        task = self.get_object()
+        queryset = self.get_queryset().subtree(task).order_by('path')
+        if wants_stream(request):
+            rows = queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)
+            return streaming_json_response(
+                stream_json_array(self.get_serializer(row).data for row in rows)
+            )
+        return Response(self.get_serializer(queryset, many=True).data)
 
-class UserTaskViewSet(viewsets.ReadOnlyModelViewSet):
+class UserTaskViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         user_id = self.kwargs['user_id']
-        return Task.objects.filter(assigned_to=user_id)
+        return self.get_serializer_class().setup_eager_loading(
+            Task.objects.filter(assigned_to=user_id)
+        )
     
 class DependencyViewSet(viewsets.ModelViewSet):
     serializer_class = DependencySerializer
@@ -90,7 +251,7 @@ class DependencyGroupViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     queryset = DependencyGroup.objects.all()
 
-class PublicProjectViewSet(viewsets.ReadOnlyModelViewSet):
+class PublicProjectViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = ProjectSerializer
     permission_classes = [permissions.AllowAny]
-    queryset = Project.objects.filter(is_public=True)
+    queryset = ProjectSerializer.setup_eager_loading(Project.objects.filter(is_public=True))
@@ -0,0 +1,8 @@
+"""Synthetic project generator and benchmark suite.
+
+Run through the management command, which uses a throwaway test
+database:
+
+    python manage.py benchmark --tasks 5000 --shape layered --output bench.json
+    python manage.py benchmark --tasks 5000 --compare bench.json
+"""
@@ -0,0 +1,87 @@
+# benchmarks/generator.py
+import random
+from django.contrib.auth.models import User
+from api.bulk import import_task_tree
+from api.models import Project
+
+SHAPES = ['chain', 'layered', 'random', 'fan']
+
+def _dependencies(index, shape, rng, width, fan_in):
+    """Indices of earlier tasks that task `index` depends on"""
+    if index == 0:
+        return []
+    if shape == 'chain':
+        return [index - 1]
+    if shape == 'fan':
+        return [0]
+    if shape == 'layered':
+        layer_start = (index // width) * width
+        if layer_start == 0:
+            return []
+        previous = range(layer_start - width, layer_start)
+        return rng.sample(previous, min(fan_in, len(previous)))
+    # random: any earlier tasks, which keeps the graph acyclic
+    return rng.sample(range(index), min(fan_in, index))
+
+def generate_project(creator, tasks=1000, shape='layered', width=50, fan_in=2,
+                     or_ratio=0.2, subtask_depth=0, subtask_ratio=0.1,
+                     users=10, assigned_ratio=0.8, seed=0):
+    """Create a project of `tasks` synthetic tasks in bulk and return it.
+
+    `shape` picks the dependency DAG (see SHAPES). Each task with
+    dependencies puts each one in its OR group with probability `or_ratio`
+    and in its AND group otherwise. Up to `subtask_ratio` of the tasks become
+    subtasks of earlier tasks, nested at most `subtask_depth` deep. The
+    same seed always produces the same project.
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"shape must be one of {SHAPES}")
+    rng = random.Random(seed)
+
+    usernames = [f'bench-user-{i}' for i in range(users)]
+    User.objects.bulk_create([User(username=name) for name in usernames], ignore_conflicts=True)
+    user_ids = list(User.objects.filter(username__in=usernames).values_list('pk', flat=True))
+
+    project = Project.objects.create(
+        creator=creator, title=f'Benchmark {shape} x{tasks}', description=f'seed={seed}'
+    )
+
+    specs = []
+    depth = []
+    for index in range(tasks):
+        parent = None
+        depth.append(0)
+        if subtask_depth and index and rng.random() < subtask_ratio:
+            candidate = rng.randrange(index)
+            if depth[candidate] < subtask_depth:
+                parent = candidate
+                depth[index] = depth[candidate] + 1
+
+        deps = [f't{d}' for d in _dependencies(index, shape, rng, width, fan_in)]
+        groups = []
+        if deps:
+            split = {'OR': [], 'AND': []}
+            for dep in deps:
+                split['OR' if rng.random() < or_ratio else 'AND'].append(dep)
+            groups = [
+                {'logic_type': logic_type, 'depends_on': refs}
+                for logic_type, refs in split.items() if refs
+            ]
+
+        specs.append({
+            'ref': f't{index}',
+            'title': f'Task {index}',
+            'description': '',
+            'duration_days': rng.randint(1, 10),
+            'is_private': False,
+            'parent': f't{parent}' if parent is not None else None,
+            'assigned_to': rng.choice(user_ids) if user_ids and rng.random() < assigned_ratio else None,
+            'dependency_groups': groups,
+        })
+
+    levels = [[] for _ in range(max(depth) + 1)]
+    for index, level in enumerate(depth):
+        levels[level].append(f't{index}')
+    import_task_tree(project, specs, levels)
+    project.refresh_from_db()
+    return project
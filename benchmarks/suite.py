@@ -0,0 +1,140 @@
+# benchmarks/suite.py
+import platform
+import statistics
+import subprocess
+import time
+import django
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.critical_path import analyze_graph
+from api.graph import load_project_graph
+from api.middleware import QueryTimer
+from api.models import Task
+from api.schedule_queue import bump_graph_version
+from api.scheduling import calculate_project_schedule, reschedule_downstream, schedule_portfolio
+from .generator import generate_project
+
+def timed(fn, repeat, setup=None):
+    """Run `fn` `repeat` times and summarise wall time and query count.
+
+    `setup` runs untimed before every run and its return value is passed
+    to `fn`, so mutating benchmarks can start from a fresh state.
+    """
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        # Counted by a wrapper; connection.queries keeps only 9000 entries
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer):
+            started = time.perf_counter()
+            fn(arg)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = timer.count
+    return {
+        'runs': repeat,
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'queries': queries,
+    }
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _roots(project):
+    return list(Task.objects.filter(
+        project=project, dependency_groups__isnull=True, parent_task__isnull=True
+    ).order_by('id')[:10])
+
+@override_settings(SCHEDULE_QUEUE={'ASYNC': False, 'DEBOUNCE_SECONDS': 0})
+def run_suite(config, repeat=5, only=None):
+    """Generate a project from `config` and run every benchmark against it.
+
+    `config` holds generate_project keyword arguments. Returns a JSON-ready
+    dict with the environment, the config and one summary per benchmark.
+    """
+    creator, _ = User.objects.get_or_create(username='bench-owner')
+    project = generate_project(creator, **config)
+    client = APIClient()
+    client.force_authenticate(creator)
+
+    middle = Task.objects.filter(project=project).order_by('id').values_list(
+        'id', flat=True
+    )[config.get('tasks', 1000) // 2]
+
+    assignees = set(Task.objects.filter(project=project, assigned_to__isnull=False).values_list(
+        'assigned_to_id', flat=True
+    ))
+
+    def cold_schedule():
+        cache.clear()
+        bump_graph_version(project.pk)
+
+    def cascade_project():
+        return _roots(generate_project(creator, **config))
+
+    def complete(tasks):
+        for task in tasks:
+            task.is_completed = True
+            task.status = 'COMPLETED'
+            task.save()
+
+    schedule_url = reverse('project-schedule', args=[project.pk])
+    benchmarks = {
+        'schedule_full': lambda _: calculate_project_schedule(project),
+        'schedule_incremental': lambda _: reschedule_downstream(project, [middle]),
+        'schedule_portfolio': lambda _: schedule_portfolio(assignees),
+        'critical_path': lambda _: analyze_graph(load_project_graph(project)),
+        'schedule_endpoint_cold': (lambda _: client.get(schedule_url), cold_schedule),
+        'schedule_endpoint_warm': lambda _: client.get(schedule_url),
+        'task_list_page': lambda _: client.get(reverse('task-list')),
+        'task_list_stream': lambda _: b''.join(
+            client.get(reverse('task-list') + '?stream=1').streaming_content
+        ),
+        'completion_cascade': (complete, cascade_project),
+    }
+
+    results = {}
+    for name, bench in benchmarks.items():
+        if only and name not in only:
+            continue
+        fn, setup = bench if isinstance(bench, tuple) else (bench, None)
+        results[name] = timed(fn, repeat, setup)
+
+    return {
+        'meta': {
+            'revision': _git_revision(),
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+        },
+        'config': {**config, 'repeat': repeat},
+        'results': results,
+    }
+
+def compare(current, baseline, threshold=1.2):
+    """Median ratios of current vs baseline results, flagging regressions.
+
+    Returns [(name, baseline_ms, current_ms, ratio, regressed)].
+    """
+    rows = []
+    for name, result in current['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or not previous['median_ms']:
+            continue
+        ratio = result['median_ms'] / previous['median_ms']
+        rows.append((name, previous['median_ms'], result['median_ms'], ratio, ratio > threshold))
+    return rows
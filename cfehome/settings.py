@@ -22,6 +22,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'api.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -29,6 +30,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'cfehome.urls'
@@ -89,7 +91,29 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly'
-    ]
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.IdCursorPagination',
+    'PAGE_SIZE': 100,
+    # Uses orjson when installed, the stdlib encoder otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# Background schedule recalculation (api/schedule_queue.py)
+SCHEDULE_QUEUE = {
+    'ASYNC': True,
+    'DEBOUNCE_SECONDS': 1.0,
+}
+
+# Bearer token required by /metrics when set (api/metrics.py)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Staff-only request profiling with ?profile=1 (api/profiling.py)
+PROFILING = {
+    'DIRECTORY': BASE_DIR / 'profiles',
+    'MAX_FILES': 50,
 }
 
 CORS_ALLOWED_ORIGINS = [
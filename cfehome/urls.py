@@ -5,6 +5,7 @@ from rest_framework.authtoken.views import obtain_auth_token
 from django.views.generic import RedirectView
 from django.conf import settings
 from django.conf.urls.static import static
+from api.metrics import metrics_view
 
 urlpatterns = [
     # Root endpoint
@@ -19,6 +20,9 @@ urlpatterns = [
     # Authentication
     path('api-token-auth/', obtain_auth_token, name='api_token_auth'),
     path('api/auth/', include('rest_framework.urls', namespace='rest_framework')),
+
+    # Prometheus metrics
+    path('metrics', metrics_view, name='metrics'),
     
     # Redirect Legacy URLs
     path('accounts/profile/', RedirectView.as_view(url='/api/projects/')),